@@ -3,11 +3,30 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import concurrent.futures
+import contextlib
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import tempfile
+import timeit
 import unittest
 
 import isolation
+import batch_eval
 import game_agent
 import sample_players
+import score_tables
+import transposition
+import tuning
+import endgame
+import game_records
+import opening_book
+import tournament
+import competition_agent
+import time_manager
 
 from importlib import reload
 
@@ -27,5 +46,705 @@ class IsolationTest(unittest.TestCase):
         curr_move = self.game._active_player.get_move(self.game.copy(), self.time_left)
         self.assertEqual((3, 6), curr_move)
 
+
+class BitBoardTest(unittest.TestCase):
+    """Check the bitboard backend against the reference Board"""
+
+    def setUp(self):
+        self.player1 = sample_players.RandomPlayer()
+        self.player2 = sample_players.RandomPlayer()
+
+    def test_random_games_match_board(self):
+        for width, height in [(7, 7), (5, 8)]:
+            board = isolation.Board(self.player1, self.player2, width, height)
+            bitboard = isolation.BitBoard(self.player1, self.player2, width, height)
+            while True:
+                legal_moves = sorted(board.get_legal_moves())
+                self.assertEqual(legal_moves, sorted(bitboard.get_legal_moves()))
+                self.assertEqual(board.to_string(), bitboard.to_string())
+                for player in (self.player1, self.player2):
+                    self.assertEqual(board.utility(player), bitboard.utility(player))
+                    self.assertEqual(board.get_player_location(player),
+                                     bitboard.get_player_location(player))
+                if not legal_moves:
+                    break
+                move = legal_moves[0]
+                board.apply_move(move)
+                bitboard = bitboard.forecast_move(move)
+
+    def test_push_pop_restores_state(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class(self.player1, self.player2)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            before = game.to_string()
+            pushed = 0
+            while game.get_legal_moves() and pushed < 10:
+                game.push_move(game.get_legal_moves()[0])
+                pushed += 1
+            for _ in range(pushed):
+                game.pop_move()
+            self.assertEqual(before, game.to_string())
+            self.assertEqual(2, game.move_count)
+            self.assertIs(self.player1, game.active_player)
+
+    def test_incremental_hash(self):
+        board = isolation.Board(self.player1, self.player2)
+        bitboard = isolation.BitBoard(self.player1, self.player2)
+        while board.get_legal_moves():
+            move = sorted(board.get_legal_moves())[0]
+            self.assertEqual(board.forecast_move(move).hash(),
+                             bitboard.forecast_move(move).hash())
+            board.apply_move(move)
+            bitboard.push_move(move)
+            self.assertEqual(board._zobrist_hash(), board.hash())
+            self.assertEqual(board.hash(), bitboard.hash())
+            self.assertEqual(board.hash(), board.copy().hash())
+
+class TranspositionTableTest(unittest.TestCase):
+    """Unit tests for the bounded transposition table"""
+
+    def test_depth_preferred_replacement(self):
+        table = transposition.TranspositionTable(4)
+        table.store(1, 5, 1., transposition.EXACT, (0, 0))
+        table.store(5, 2, 2., transposition.LOWER, (1, 1))
+        self.assertEqual(5, table.probe(1)[1])
+        self.assertEqual((1, 1), table.probe(5)[4])
+        self.assertIsNone(table.probe(9))
+        self.assertEqual((2, 1, 1), (table.hits, table.misses, table.collisions))
+
+    def test_alphabeta_with_table(self):
+        player1 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                             tt_size=1 << 10)
+        player2 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+        game = isolation.Board(player1, player2)
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        player1.time_left = lambda: float("inf")
+        for depth in range(1, 4):
+            move = player1.alphabeta(game, depth)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player1.tt.hits, 0)
+
+    def test_move_ordering_preserves_value(self):
+        values = []
+        for move_ordering in (False, True):
+            player1 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                 move_ordering=move_ordering)
+            player2 = sample_players.RandomPlayer()
+            game = isolation.BitBoard(player1, player2)
+            game.apply_move((3, 3))
+            game.apply_move((2, 3))
+            player1.time_left = lambda: float("inf")
+            for depth in range(1, 5):
+                player1.alphabeta(game, depth)
+            values.append(player1._AlphaBetaPlayer__max_value(
+                game.copy(), 4, float("-inf"), float("inf"))[0])
+        self.assertEqual(values[0], values[1])
+
+    def test_pvs_and_aspiration_preserve_value(self):
+        values = []
+        for options in ({}, {"pvs": True}, {"pvs": True, "aspiration": 0.5}):
+            player1 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                 move_ordering=True, **options)
+            player1.time_left = lambda: float("inf")
+            game = isolation.BitBoard(player1, object())
+            game.apply_move((3, 3))
+            game.apply_move((2, 3))
+            for depth in range(1, 5):
+                if player1.aspiration and depth > 1:
+                    player1._AlphaBetaPlayer__aspiration_search(game, depth)
+                else:
+                    player1.alphabeta(game, depth)
+            values.append(player1.root_value)
+        self.assertEqual(values[0], values[1])
+        self.assertEqual(values[0], values[2])
+
+
+class ParallelSearchTest(unittest.TestCase):
+    """Check that splitting the root between workers preserves the result"""
+
+    def test_root_split_matches_full_search(self):
+        player1 = game_agent.AlphaBetaPlayer(tt_size=1 << 10, move_ordering=True)
+        player1.time_left = lambda: float("inf")
+        game = isolation.BitBoard(player1, object())
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        player1.alphabeta(game, 4)
+        value = player1.root_value
+        moves = game.get_legal_moves()
+        split_values = []
+        for share in (moves[0::2], moves[1::2]):
+            move = player1.alphabeta(game, 4, root_moves=share)
+            self.assertIn(move, share)
+            split_values.append(player1.root_value)
+        self.assertEqual(value, max(split_values))
+
+    def test_parallel_player_returns_legal_move(self):
+        player1 = game_agent.ParallelAlphaBetaPlayer(workers=2, timeout=20.)
+        game = isolation.BitBoard(player1, sample_players.GreedyPlayer())
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        end = timeit.default_timer() + 0.3
+        try:
+            move = player1.get_move(game, lambda: 1000 * (end - timeit.default_timer()))
+        finally:
+            player1.close()
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player1.completed_depths[-1], 0)
+
+    def test_workers_start_with_first_move(self):
+        before = set(multiprocessing.active_children())
+        player1 = game_agent.ParallelAlphaBetaPlayer(workers=2)
+        copy = pickle.loads(pickle.dumps(player1))
+        self.assertIsNone(player1._pool)
+        self.assertIsNone(copy._pool)
+        self.assertEqual(before, set(multiprocessing.active_children()))
+
+    def test_proven_share_does_not_limit_depth(self):
+        # the second worker proved at depth 2 that all of its moves lose
+        reports = [[(1, 2., (0, 1)), (2, 1., (0, 1)), (3, 3., (1, 0))],
+                   [(1, 5., (2, 2)), (2, float("-inf"), (2, 2))]]
+        depth, best = game_agent._combine_reports(reports, 40)
+        self.assertEqual(3, depth)
+        self.assertEqual((3, 3., (1, 0)), best)
+        # a share searched to the end of the game stands as well
+        reports[1] = [(1, 5., (2, 2)), (2, 4., (2, 2))]
+        depth, best = game_agent._combine_reports(reports, 2)
+        self.assertEqual((3, (2, 4., (2, 2))), (depth, best))
+        self.assertEqual(2, game_agent._combine_reports(reports, 40)[0])
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Check the per-move search statistics"""
+
+    def test_alphabeta_records_move(self):
+        player1 = game_agent.AlphaBetaPlayer(stats=True)
+        game = isolation.BitBoard(player1, sample_players.GreedyPlayer())
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        end = timeit.default_timer() + 0.2
+        player1.get_move(game, lambda: 1000 * (end - timeit.default_timer()))
+        record, = player1.stats.moves
+        self.assertEqual(record["nodes"], player1.nodes_searched)
+        self.assertGreater(record["leaf_evals"], 0)
+        self.assertEqual(len(record["depth_times"]), record["depth"])
+        self.assertGreater(sum(record["cutoffs"].values()), 0)
+
+    def test_disabled_by_default(self):
+        player1 = game_agent.AlphaBetaPlayer()
+        self.assertIsNone(player1.stats)
+        self.assertIs(player1.score, game_agent.custom_score)
+
+
+class TimeManagerTest(unittest.TestCase):
+    """Check the iteration predictions of the time manager"""
+
+    def setUp(self):
+        self.clock = [1000.]
+        self.time_left = lambda: self.clock[0]
+        self.game = isolation.BitBoard(object(), object())
+        self.game.apply_move((3, 3))
+        self.game.apply_move((2, 3))
+
+    def test_skips_iteration_that_cannot_finish(self):
+        manager = time_manager.TimeManager()
+        manager.start_move(self.game, self.time_left, 50.)
+        for duration in (10., 40.):
+            self.clock[0] -= duration
+            manager.iteration_done()
+        # 50ms spent, the next iteration is predicted to take 4 * 40ms
+        self.assertTrue(manager.next_iteration_fits(3))
+        self.clock[0] -= 500.
+        manager.iteration_done()
+        self.assertFalse(manager.next_iteration_fits(4))
+        self.assertEqual(manager.skipped, 1)
+
+    def test_game_clock_budget(self):
+        manager = time_manager.TimeManager(game_clock=True, hard_factor=2.)
+        timer = manager.start_move(self.game, self.time_left, 50.)
+        moves_to_go = len(self.game.get_blank_spaces()) * manager.moves_fraction
+        self.assertAlmostEqual(manager.budget, 950. / moves_to_go)
+        # the search is aborted after twice the budget
+        self.assertAlmostEqual(timer() - 50., 2 * manager.budget)
+
+
+class PonderTest(unittest.TestCase):
+    """Check the pondering protocol of Board.play"""
+
+    class RecordingPlayer(sample_players.GreedyPlayer):
+        def __init__(self):
+            super().__init__()
+            self.calls = []
+
+        def ponder(self, game):
+            self.calls.append(("ponder", game.move_count))
+
+        def stop_pondering(self, move):
+            self.calls.append(("stop", move))
+
+    def test_play_notifies_ponderer(self):
+        player1 = self.RecordingPlayer()
+        player2 = sample_players.GreedyPlayer()
+        game = isolation.BitBoard(player1, player2)
+        _, history, _ = game.play(ponder=True)
+        ponders = [call for call in player1.calls if call[0] == "ponder"]
+        stops = [call[1] for call in player1.calls if call[0] == "stop"]
+        # every move is followed by pondering that is stopped with the reply
+        self.assertEqual([count for _, count in ponders], list(range(1, 2 * len(ponders), 2)))
+        self.assertEqual(stops[:-1] if stops[-1] is None else stops,
+                         [tuple(move) for move in history[1::2]])
+        self.assertEqual(len(stops), len(ponders))
+
+    def test_alphabeta_reuses_pondered_search(self):
+        player1 = game_agent.AlphaBetaPlayer(ponder=True)
+        player2 = object()
+        game = isolation.BitBoard(player1, player2)
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        move = game.get_legal_moves()[0]
+        game.apply_move(move)
+        try:
+            player1.ponder(game)
+            reply, _ = player1._ponder_task
+            # stop once the background search has completed an iteration
+            self.assertTrue(player1._ponder_progress.wait(timeout=30))
+            player1.stop_pondering(reply)
+        finally:
+            player1.close()
+        self.assertEqual(player1.ponder_hits, 1)
+        depth, pondered_move, _, value = player1._ponder_result
+        pondered = game.forecast_move(reply)
+        self.assertIn(pondered_move, pondered.get_legal_moves())
+        # the value of the pondered iteration comes back with it
+        player1.time_left = lambda: float("inf")
+        player1.alphabeta(pondered, depth)
+        self.assertEqual(value, player1.root_value)
+
+
+class ScoreTablesTest(unittest.TestCase):
+    """Check the table-driven heuristics against the board API"""
+
+    def test_heuristics_match_board_api(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            player1, player2 = object(), object()
+            games = [isolation.Board(player1, player2), isolation.BitBoard(player1, player2)]
+            for _ in range(rng.randint(2, 30)):
+                moves = sorted(games[0].get_legal_moves())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                for game in games:
+                    game.apply_move(move)
+            game = games[0]
+            for player in (player1, player2):
+                opponent = game.get_opponent(player)
+                if game.is_loser(player) or game.is_winner(player):
+                    expected = game.utility(player)
+                else:
+                    expected = float(len(game.get_legal_moves(player)) -
+                                     len(game.get_legal_moves(opponent)))
+                for board in games:
+                    self.assertEqual(expected, sample_players.improved_score(board, player))
+                    for score_fn in (game_agent.custom_score, game_agent.custom_score_2,
+                                     game_agent.custom_score_3, sample_players.center_score):
+                        self.assertAlmostEqual(score_fn(games[0], player), score_fn(board, player))
+
+    def test_heuristics_match_reference_formulas(self):
+        # the formulas the tables replaced, written against the board API
+        def percent(game):
+            return game.move_count / (game.height * game.width) * 100
+
+        def moves(game, player):
+            return (game.get_legal_moves(player),
+                    game.get_legal_moves(game.get_opponent(player)))
+
+        def reference_custom_score(game, player):
+            own, opp = moves(game, player)
+            w, h = game.width / 2., game.height / 2.
+            y, x = game.get_player_location(player)
+            y2, x2 = game.get_player_location(game.get_opponent(player))
+            own_distance = float((h - y)**2 + (w - x)**2)
+            opp_distance = float((h - y2)**2 + (w - x2)**2)
+            return (len(own) - len(opp)) + (opp_distance - own_distance)*0.634/game.move_count
+
+        def reference_custom_score_2(game, player):
+            own, opp = moves(game, player)
+            y, x = game.get_player_location(player)
+            steps = abs(x - math.ceil(game.width/2)) + abs(y - math.ceil(game.height/2)) - 1
+            if percent(game) < 10:
+                return 2*len(own) - 0.5*steps
+            if percent(game) < 40:
+                return 3*len(own) - len(opp) - 0.5*steps
+            return 2*len(own) - len(opp)
+
+        def reference_custom_score_3(game, player):
+            own, opp = moves(game, player)
+            if percent(game) >= 40:
+                return len(own) - 2*len(opp)
+            w, h = game.get_player_location(game.get_opponent(player))
+            y, x = game.get_player_location(player)
+            distance = float((h - y)**2 + (w - x)**2)
+            wall = [(c, r) for c in (0, game.width-1) for r in range(game.width)] + \
+                [(c, r) for r in (0, game.height-1) for c in range(game.height)]
+            penalty = -1 if (x, y) in wall else 0
+            quality = 0
+            for move in own:
+                y, x = move
+                dist = float((h - y)**2 + (w - x)**2)
+                quality += 1/dist if dist else 1
+                quality -= move in opp
+            return len(own) - len(opp) - distance + quality + penalty
+
+        def reference_center_score(game, player):
+            w, h = game.width / 2., game.height / 2.
+            y, x = game.get_player_location(player)
+            return float((h - y)**2 + (w - x)**2)
+
+        pairs = [(game_agent.custom_score, reference_custom_score),
+                 (game_agent.custom_score_2, reference_custom_score_2),
+                 (game_agent.custom_score_3, reference_custom_score_3),
+                 (sample_players.center_score, reference_center_score)]
+        rng = random.Random(1)
+        checked = 0
+        for plies in list(range(2, 36, 3)) * 3:
+            player1, player2 = object(), object()
+            boards = [isolation.Board(player1, player2), isolation.BitBoard(player1, player2)]
+            for _ in range(plies):
+                legal = sorted(boards[0].get_legal_moves())
+                if not legal:
+                    break
+                move = rng.choice(legal)
+                for board in boards:
+                    board.apply_move(move)
+            game = boards[0]
+            # the references leave out the won and lost positions
+            if not (game.get_legal_moves(player1) and game.get_legal_moves(player2)):
+                continue
+            for board in boards:
+                for player in (player1, player2):
+                    for score_fn, reference in pairs:
+                        self.assertAlmostEqual(reference(game, player), score_fn(board, player))
+            checked += 1
+        self.assertGreater(checked, 20)
+
+
+class BatchEvalTest(unittest.TestCase):
+    """Check the vectorized heuristics against their scalar versions"""
+
+    def test_batch_search_matches_scalar_search(self):
+        # weights that change every term and move the phase cutoff
+        tuned = game_agent.Score3Weights(1.5, 0.5, 2., 0.25, 3., 10., 2.5, 0.75)
+        tuned_score_3 = batch_eval.BatchScore(batch_eval.batch_custom_score_3.batch_fn,
+                                              game_agent.custom_score_3, tuned)
+        for batch_score in (batch_eval.batch_improved_score, batch_eval.batch_custom_score,
+                            batch_eval.batch_custom_score_3, tuned_score_3):
+            for board_class in (isolation.Board, isolation.BitBoard):
+                values = []
+                for batch_leaves in (False, True):
+                    player1 = game_agent.AlphaBetaPlayer(
+                        score_fn=batch_score, move_ordering=True, batch_leaves=batch_leaves)
+                    player1.time_left = lambda: float("inf")
+                    game = board_class(player1, object())
+                    game.apply_move((3, 3))
+                    game.apply_move((2, 3))
+                    for depth in range(1, 4):
+                        player1.alphabeta(game, depth)
+                    values.append(player1.root_value)
+                self.assertAlmostEqual(values[0], values[1])
+
+    def test_batch_score_binds_weights(self):
+        tuned = game_agent.Score3Weights(1.5, 0.5, 2., 0.25, 3., 10., 2.5, 0.75)
+        batch_score = batch_eval.BatchScore(batch_eval.batch_custom_score_3.batch_fn,
+                                            game_agent.custom_score_3, tuned)
+        player1, player2 = "p1", "p2"
+        game = isolation.BitBoard(player1, player2)
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        self.assertNotEqual(game_agent.custom_score_3(game, player1),
+                            batch_score(game, player1))
+        rng = random.Random(0)
+        while game.move_count < 8 and game.get_legal_moves():
+            moves = game.get_legal_moves()
+            values = batch_score.evaluate(game, player1, moves)
+            for move, value in zip(moves, values):
+                child = game.forecast_move(move)
+                self.assertAlmostEqual(game_agent.custom_score_3(child, player1, tuned), value)
+            game.apply_move(rng.choice(moves))
+
+    def test_requires_batch_heuristic(self):
+        with self.assertRaises(ValueError):
+            game_agent.AlphaBetaPlayer(score_fn=game_agent.custom_score, batch_leaves=True)
+
+
+class EndgameTest(unittest.TestCase):
+    """Compare the partitioned-board solver with exhaustive search"""
+
+    def active_player_wins(self, game):
+        for move in game.get_legal_moves():
+            game.push_move(move)
+            opponent_wins = self.active_player_wins(game)
+            game.pop_move()
+            if not opponent_wins:
+                return True
+        return False
+
+    def test_solver_matches_exhaustive_search(self):
+        rng = random.Random(0)
+        solved = 0
+        while solved < 20:
+            game = isolation.BitBoard(object(), object(), 5, 5)
+            while game.get_legal_moves() and game.move_count < rng.randint(10, 16):
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            result = endgame.solve(game)
+            if result is None:
+                continue
+            solved += 1
+            self.assertEqual(self.active_player_wins(game.copy()), result[0])
+            if result[0]:
+                self.assertFalse(self.active_player_wins(game.forecast_move(result[1])))
+
+
+class TuningTest(unittest.TestCase):
+    """Check the self-play tuner of custom_score_3"""
+
+    def test_spsa_moves_toward_winner(self):
+        spsa = tuning.SPSA(list(game_agent.SCORE_3_WEIGHTS), tuning.SCALES, tuning.BOUNDS)
+        plus, minus, delta = spsa.perturbations(0, seed=1)
+        self.assertEqual((plus, minus, delta), spsa.perturbations(0, seed=1))
+        before = spsa.theta
+        spsa.update(0, delta, 1.)
+        for old, new, p, m in zip(before, spsa.theta, plus, minus):
+            self.assertLess(abs(new - p), abs(new - m))
+            self.assertNotEqual(old, new)
+        spsa.theta = before
+        spsa.update(0, delta, 0.5)
+        self.assertEqual(before, spsa.theta)
+
+    def test_self_play_match(self):
+        opening = [(3, 3), (2, 3)]
+        theta = list(game_agent.SCORE_3_WEIGHTS)
+        self.assertIn(tuning.play_match(theta, theta, opening, "seed", 1), (0, 1, 2))
+        player = tuning.make_player(theta, 1)
+        game = isolation.BitBoard(player, object())
+        game.apply_move((3, 3))
+        game.apply_move((2, 3))
+        self.assertEqual(game_agent.custom_score_3(game, player), player.score(game, player))
+
+
+class GameRecordsTest(unittest.TestCase):
+    """Check that recorded tournament games replay to the same results"""
+
+    def test_record_and_replay(self):
+        agents = [tournament.Agent(sample_players.RandomPlayer(), "Random_1"),
+                  tournament.Agent(sample_players.RandomPlayer(), "Random_2")]
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            writer = game_records.GameWriter(path)
+            for seed in range(3):
+                results = tournament.play_fair_match(agents[0], agents[1], seed)
+                tournament.record_match(writer, agents[0], agents[1], results)
+            writer.close()
+            records = list(game_records.read_games(path))
+            self.assertEqual(6, len(records))
+            self.assertEqual(("Random_1", "Random_2"), records[0].names)
+            for record in records:
+                for game, move in game_records.replay(record):
+                    self.assertIn(move, game.get_legal_moves())
+                # the player left without moves lost
+                self.assertFalse(game.get_legal_moves())
+                self.assertEqual(record.winner, 1 - game.move_count % 2)
+            positions = list(game_records.iter_positions(path))
+            self.assertEqual(sum(len(r.moves) for r in records), len(positions))
+            arrays = game_records.load_positions(path)
+            self.assertEqual(len(positions) - 2 * len(records), len(arrays["outcome"]))
+            self.assertEqual(set(arrays["outcome"]), {-1, 1})
+        finally:
+            os.remove(path)
+
+
+class TournamentTest(unittest.TestCase):
+    """Check that parallel tournaments reproduce serial tournaments"""
+
+    def setUp(self):
+        self.cpu_agents = [tournament.Agent(sample_players.RandomPlayer(), "Random")]
+        self.test_agents = [tournament.Agent(sample_players.GreedyPlayer(), "Greedy"),
+                            tournament.Agent(sample_players.RandomPlayer(), "Random_2")]
+
+    def play(self, workers, path):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return tournament.play_matches(self.cpu_agents, self.test_agents, 4,
+                                           workers=workers, seed=7, record_file=path)
+
+    def play_agents(self, test_agents, num_matches):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return tournament.play_matches(self.cpu_agents, test_agents, num_matches, seed=7)
+
+    def test_parallel_matches_serial(self):
+        paths = []
+        try:
+            for _ in range(2):
+                fd, path = tempfile.mkstemp()
+                os.close(fd)
+                os.remove(path)
+                paths.append(path)
+            serial = self.play(1, paths[0])
+            parallel = self.play(2, paths[1])
+            self.assertEqual(serial, parallel)
+            records = [list(game_records.read_games(path)) for path in paths]
+            # 4 fair matches of 2 games against each test agent
+            self.assertEqual(16, len(records[0]))
+            self.assertEqual(records[0], records[1])
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_game_time_requires_game_clock(self):
+        agent = tournament.Agent(tournament.AlphaBetaPlayer(), "AB")
+        original = tournament.GAME_TIME
+        tournament.GAME_TIME = 3000
+        try:
+            with self.assertRaises(ValueError):
+                self.play_agents([agent], 1)
+            agent.player.time_manager = time_manager.TimeManager(game_clock=True)
+            wins = self.play_agents([agent], 1)
+            self.assertEqual(set(wins), {agent.player})
+        finally:
+            tournament.GAME_TIME = original
+
+    def test_failed_match_stops_workers(self):
+        before = set(multiprocessing.active_children())
+        agents = [tournament.Agent(FailingPlayer(), "Failing")]
+        with self.assertRaises(RuntimeError):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                tournament.play_matches(self.cpu_agents, agents, 4, workers=2, seed=7)
+        self.assertEqual(before, set(multiprocessing.active_children()))
+
+
+class FailingPlayer:
+    """Player whose search always fails"""
+
+    def get_move(self, game, time_left):
+        raise RuntimeError("search failed")
+
+
+class SPRTTest(unittest.TestCase):
+    """Check the sequential test and its early stopping of pairings"""
+
+    def setUp(self):
+        self.sprt = tournament.SPRT(p0=0.45, p1=0.55, alpha=0.05, beta=0.05)
+        self.cpu_agent = tournament.Agent(object(), "cpu")
+        self.test_agent = tournament.Agent(object(), "test")
+
+    def test_bounds(self):
+        self.assertAlmostEqual(self.sprt.upper, math.log(19))
+        self.assertAlmostEqual(self.sprt.lower, -math.log(19))
+        self.assertAlmostEqual(self.sprt.llr(3, 1), 2 * math.log(0.55 / 0.45))
+
+    def test_wins_accept_h1(self):
+        needed = math.ceil(self.sprt.upper / math.log(0.55 / 0.45))
+        self.assertIsNone(self.sprt.decide(needed - 1, 0))
+        self.assertEqual("H1", self.sprt.decide(needed, 0))
+
+    def test_losses_accept_h0(self):
+        needed = math.ceil(-self.sprt.lower / math.log(0.55 / 0.45))
+        self.assertIsNone(self.sprt.decide(0, needed - 1))
+        self.assertEqual("H0", self.sprt.decide(0, needed))
+
+    def test_even_results_stay_undecided(self):
+        outcomes = [True, False] * 20
+        win_counts, game_counts, futures = self.play(outcomes, num_matches=20)
+        self.assertEqual([], self.sprt.decisions)
+        self.assertEqual(40, game_counts[self.test_agent.player])
+        self.assertEqual(20, win_counts[self.test_agent.player])
+
+    def test_early_stop_ignores_cancelled_matches(self):
+        # the first 10 matches are won and the next 5 lost; the last 5 are
+        # still pending. H1 is accepted before any loss is reached.
+        outcomes = [True] * 20 + [False] * 10
+        win_counts, game_counts, futures = self.play(outcomes, num_matches=20)
+        needed = math.ceil(self.sprt.upper / math.log(0.55 / 0.45))
+        played = needed + needed % 2
+        self.assertEqual([("cpu", "test", "H1", played)], self.sprt.decisions)
+        self.assertEqual(played, game_counts[self.test_agent.player])
+        self.assertEqual(played, win_counts[self.test_agent.player])
+        self.assertEqual(0, win_counts[self.cpu_agent.player])
+        for match_idx in range(15, 20):
+            self.assertTrue(futures[(0, match_idx)].cancelled())
+
+    def play(self, outcomes, num_matches):
+        """Play a round from futures holding the given game outcomes of the
+        test agent, two per match; matches without outcomes stay pending.
+        """
+        futures = {}
+        for match_idx in range(num_matches):
+            future = concurrent.futures.Future()
+            games = outcomes[2 * match_idx:2 * match_idx + 2]
+            if games:
+                results = [tournament.GameResult(won, "illegal move", 0, (7, 7), [])
+                           for won in games]
+                future.set_result((results, [(0, []), (0, [])]))
+            futures[(0, match_idx)] = future
+        win_counts = {self.cpu_agent.player: 0, self.test_agent.player: 0}
+        game_counts = {}
+        tournament.play_round(self.cpu_agent, [self.test_agent], win_counts, num_matches,
+                              seed=0, sprt=self.sprt, game_counts=game_counts,
+                              futures=futures)
+        return win_counts, game_counts, futures
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Check that symmetric openings share one book entry"""
+
+    def test_symmetric_lookups(self):
+        entries = opening_book.build_book(2, 2, game_agent.custom_score, verbose=False)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            opening_book.write_book(path, 7, 7, entries)
+            book = opening_book.OpeningBook(path)
+            # one representative per symmetry class of first moves
+            self.assertEqual(len(book), 1 + 10)
+            moves = []
+            for first in [(0, 0), (6, 6), (0, 6), (6, 0)]:
+                game = isolation.BitBoard(object(), object())
+                game.apply_move(first)
+                move = book.lookup(game)
+                self.assertIn(move, game.get_legal_moves())
+                moves.append(move)
+            self.assertEqual(moves[1], (6 - moves[0][0], 6 - moves[0][1]))
+            book.close()
+        finally:
+            os.remove(path)
+
+
+class MCTSTest(unittest.TestCase):
+    """Check the Monte Carlo player's move choice and tree reuse"""
+
+    def budget(self, playouts):
+        # a timer that allows a fixed number of playouts
+        calls = iter(range(playouts + 2, 0, -1))
+        return lambda: next(calls, 0) * 100.
+
+    def test_tree_is_reused_after_reply(self):
+        player = competition_agent.MCTSPlayer(timeout=150.)
+        game = isolation.BitBoard(player, object())
+        game.apply_move((2, 2))
+        game.apply_move((3, 4))
+        move = player.get_move(game, self.budget(500))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.playouts, 500)
+
+        game.apply_move(move)
+        reply = max(player._root.children.values(), key=lambda n: n.visits)
+        visits = reply.visits
+        game.apply_move(reply.move)
+        player.get_move(game, self.budget(100))
+        self.assertEqual(reply.visits, visits + 100)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,207 @@
+"""This file contains vectorized heuristics that score every child of a
+frontier node in one NumPy call.
+
+With `AlphaBetaPlayer(batch_leaves=True)`, a node one ply above the search
+horizon does not recurse into its children. Instead it encodes them as
+arrays and passes them to a `BatchScore`:
+
+    open_cells : (n, cells) bool, the open cells of each child
+    own, opp   : (n,) int, the cell of the searching player and of its
+                 opponent in each child
+
+The heuristic is then a handful of array expressions over all the children
+at once, so heavier evaluations do not pay the Python overhead once per
+leaf. Every child is scored, including those a beta cutoff would have
+skipped, and a batch costs tens of microseconds however small it is, so
+the mode only pays off for heuristics much slower than `improved_score`.
+
+Every `BatchScore` wraps a scalar heuristic that returns the same values.
+That heuristic scores the positions that cannot be encoded (players that
+have not moved yet) and every other leaf of the search.
+"""
+import numpy as np
+
+from isolation import BitBoard, Board
+from score_tables import locations, score_tables
+import game_agent
+import sample_players
+
+# cache of per-size arrays keyed by (width, height)
+_ARRAYS = {}
+
+
+class BatchTables:
+    """The `score_tables.ScoreTables` of one board size as NumPy arrays.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+    """
+
+    def __init__(self, width, height):
+        tables = score_tables(width, height)
+        size = tables.size
+        self.size = size
+        self.knight = np.zeros((size, size), dtype=bool)
+        for idx, cells in enumerate(tables.neighbours):
+            self.knight[idx, list(cells)] = True
+        self.center_distance = np.array(tables.center_distance)
+        self.center_steps = np.array(tables.center_steps)
+        self.on_wall = np.array(tables.on_wall)
+        self.cross_distance = np.array(tables.cross_distance).reshape(size, size)
+        self.move_quality = np.array(tables.move_quality).reshape(size, size)
+
+
+def batch_tables(width, height):
+    """Return the `BatchTables` of the given board size. """
+    key = (width, height)
+    if key not in _ARRAYS:
+        _ARRAYS[key] = BatchTables(width, height)
+    return _ARRAYS[key]
+
+
+class LeafBatch:
+    """The children of one node, encoded for a vectorized heuristic.
+
+    Attributes
+    ----------
+    tables : `BatchTables`
+        The arrays of the board size.
+
+    open_cells : numpy.ndarray
+        (n, cells) bool array of the open cells of each child.
+
+    own, opp : numpy.ndarray
+        (n,) int arrays of the cells of the player and of its opponent.
+
+    own_to_move : bool
+        True if the player is the one to move in the children.
+
+    move_count : int
+        The number of moves played in the children.
+
+    width, height : int
+        The size of the board.
+    """
+
+    def __init__(self, game, player, moves):
+        self.tables = tables = batch_tables(game.width, game.height)
+        self.width, self.height = game.width, game.height
+        own, opp = locations(game, player)
+        if isinstance(game, BitBoard):
+            open_mask = (1 << tables.size) - 1 & ~game._blocked
+            packed = np.frombuffer(open_mask.to_bytes((tables.size + 7) // 8, "little"),
+                                   dtype=np.uint8)
+            open_base = np.unpackbits(packed, bitorder="little")[:tables.size].astype(bool)
+        else:
+            open_base = np.array(game._board_state[:tables.size]) == Board.BLANK
+        cells = np.array([r + c * game.height for r, c in moves])
+        count = len(moves)
+        self.open_cells = np.repeat(open_base[np.newaxis], count, axis=0)
+        self.open_cells[np.arange(count), cells] = False
+        # the player to move in the parent makes the move of each child
+        self.own_to_move = player != game.active_player
+        if self.own_to_move:
+            self.own, self.opp = np.full(count, own), cells
+        else:
+            self.own, self.opp = cells, np.full(count, opp)
+        self.move_count = game.move_count + 1
+
+    def moves(self):
+        """Return (n, cells) bool arrays of the legal moves of the player
+        and of its opponent in each child.
+        """
+        knight = self.tables.knight
+        return knight[self.own] & self.open_cells, knight[self.opp] & self.open_cells
+
+    def outcome(self, values, own_moves, opp_moves):
+        """Replace the values of the children in which the game is over with
+        -inf or +inf, given the number of legal moves of both players.
+        """
+        if self.own_to_move:
+            return np.where(own_moves == 0, float("-inf"), values)
+        return np.where(opp_moves == 0, float("inf"), values)
+
+    def percent_completed(self):
+        """Return the percentage of the board filled in the children (see
+        `game_agent.percent_game_completed`).
+        """
+        return self.move_count/(self.height * self.width)*100
+
+
+class BatchScore:
+    """A heuristic that can score the children of a node in one call.
+
+    Parameters
+    ----------
+    batch_fn : callable
+        Maps a `LeafBatch` to an (n,) array of values.
+
+    scalar_fn : callable
+        The heuristic returning the same values as `batch_fn` for a single
+        position.
+
+    weights : object (optional)
+        The weights of a tunable heuristic (e.g., `game_agent.Score3Weights`).
+        Both functions then get them as an extra argument, so that the batch
+        and the scalar versions always score with the same values.
+    """
+
+    def __init__(self, batch_fn, scalar_fn, weights=None):
+        self.batch_fn = batch_fn
+        self.scalar_fn = scalar_fn
+        self.weights = weights
+
+    def __call__(self, game, player):
+        if self.weights is None:
+            return self.scalar_fn(game, player)
+        return self.scalar_fn(game, player, self.weights)
+
+    def evaluate(self, game, player, moves):
+        """Return the list of values for `player` of the positions after
+        each of the active player's `moves`.
+        """
+        if None in locations(game, player):
+            return [self(game.forecast_move(move), player) for move in moves]
+        leaves = LeafBatch(game, player, moves)
+        if self.weights is None:
+            return self.batch_fn(leaves).tolist()
+        return self.batch_fn(leaves, self.weights).tolist()
+
+
+def _improved_score(leaves):
+    own_moves, opp_moves = (m.sum(axis=1) for m in leaves.moves())
+    return leaves.outcome((own_moves - opp_moves).astype(float), own_moves, opp_moves)
+
+
+def _custom_score(leaves):
+    own_moves, opp_moves = (m.sum(axis=1) for m in leaves.moves())
+    distance = leaves.tables.center_distance
+    values = (own_moves - opp_moves) + \
+        (distance[leaves.opp] - distance[leaves.own])*0.634/(leaves.move_count)
+    return leaves.outcome(values, own_moves, opp_moves)
+
+
+def _custom_score_3(leaves, weights):
+    own_mask, opp_mask = leaves.moves()
+    own_moves, opp_moves = own_mask.sum(axis=1), opp_mask.sum(axis=1)
+    if leaves.percent_completed() >= weights.phase:
+        values = (weights.late_own*own_moves - weights.late_opp*opp_moves).astype(float)
+    else:
+        tables = leaves.tables
+        quality = tables.move_quality[:, leaves.opp].T
+        quality_of_move = (quality * own_mask).sum(axis=1) - (own_mask & opp_mask).sum(axis=1)
+        values = weights.own*own_moves - weights.opp*opp_moves - \
+            weights.distance*tables.cross_distance[leaves.own, leaves.opp] + \
+            weights.quality*quality_of_move - weights.wall*tables.on_wall[leaves.own]
+    return leaves.outcome(values, own_moves, opp_moves)
+
+
+batch_improved_score = BatchScore(_improved_score, sample_players.improved_score)
+batch_custom_score = BatchScore(_custom_score, game_agent.custom_score)
+batch_custom_score_3 = BatchScore(_custom_score_3, game_agent.custom_score_3,
+                                  game_agent.SCORE_3_WEIGHTS)
@@ -0,0 +1,228 @@
+"""Benchmark the isolation board backends and the search agents.
+
+Every run uses the same positions (reached by seeded random move sequences)
+and reseeds the global random state before each search, so node counts are
+reproducible and timings can be compared between commits and backends.
+
+The suite measures:
+
+    micro   : time per call of get_legal_moves, forecast_move, copy and
+              utility on each position
+    perft   : the number of legal move sequences to a fixed depth from each
+              position, with the time taken
+    search  : nodes and node rate of fixed-depth `alphabeta` and `minimax`
+              on each position
+
+Results are printed as a table and written as JSON with --output; with
+--compare, the ratio of every timing to a previous result file is shown.
+
+Usage:
+
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import timeit
+
+import game_agent
+from isolation import Board, BitBoard
+
+BACKENDS = {"Board": Board, "BitBoard": BitBoard}
+
+
+def positions(count, plies, seed):
+    """Return `count` move sequences of `plies` random moves (drawn from a
+    fixed seed) that leave the player to move with legal moves.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        game = Board("p1", "p2")
+        moves = []
+        for _ in range(plies):
+            moves.append(rng.choice(sorted(game.get_legal_moves())))
+            game.apply_move(moves[-1])
+            if not game.get_legal_moves():
+                break
+        else:
+            openings.append(moves)
+    return openings
+
+
+def setup(board_class, moves, player_1="p1", player_2="p2"):
+    """Return a board of the given class after playing the moves. """
+    game = board_class(player_1, player_2)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def perft(game, depth):
+    """Count the sequences of legal moves of length `depth` from `game`
+    (sequences that end the game early count once).
+    """
+    if depth == 0:
+        return 1
+    moves = game.get_legal_moves()
+    if not moves:
+        return 1
+    count = 0
+    for move in moves:
+        game.push_move(move)
+        count += perft(game, depth - 1)
+        game.pop_move()
+    return count
+
+
+def time_call(fn, repeat, number):
+    """Return the best time per call (in microseconds) of `repeat` runs of
+    `number` calls.
+    """
+    return 1e6 * min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+
+
+def bench_micro(board_class, openings, repeat, number):
+    """Time the board primitives, averaged over the positions. """
+    results = {}
+    for name in ("get_legal_moves", "forecast_move", "copy", "utility"):
+        total = 0.
+        for moves in openings:
+            game = setup(board_class, moves)
+            player = game.active_player
+            move = sorted(game.get_legal_moves())[0]
+            fn = {
+                "get_legal_moves": game.get_legal_moves,
+                "forecast_move": lambda: game.forecast_move(move),
+                "copy": game.copy,
+                "utility": lambda: game.utility(player),
+            }[name]
+            total += time_call(fn, repeat, number)
+        results[name] = {"us_per_call": total / len(openings)}
+    return results
+
+
+def bench_perft(board_class, openings, depth):
+    """Run perft to `depth` from every position. """
+    counts = []
+    start = timeit.default_timer()
+    for moves in openings:
+        counts.append(perft(setup(board_class, moves), depth))
+    elapsed = timeit.default_timer() - start
+    return {"depth": depth, "counts": counts, "seconds": elapsed,
+            "nodes_per_second": sum(counts) / elapsed}
+
+
+def bench_search(board_class, openings, method, depth, seed):
+    """Run a fixed-depth search ("alphabeta" or "minimax") from every
+    position with a fresh player.
+    """
+    nodes = 0
+    elapsed = 0.
+    for moves in openings:
+        if method == "alphabeta":
+            player = game_agent.AlphaBetaPlayer(search_depth=depth)
+        else:
+            player = game_agent.MinimaxPlayer(search_depth=depth)
+        player.time_left = lambda: float("inf")
+        game = setup(board_class, moves, *((player, "opponent") if len(moves) % 2 == 0
+                                            else ("opponent", player)))
+        random.seed(seed)
+        start = timeit.default_timer()
+        getattr(player, method)(game, depth)
+        elapsed += timeit.default_timer() - start
+        nodes += player.nodes_searched
+    return {"depth": depth, "nodes": nodes, "seconds": elapsed,
+            "nodes_per_second": nodes / elapsed}
+
+
+def git_commit():
+    """Return the abbreviated commit of the working tree, if known. """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """Run every benchmark and return the results as a dict. """
+    openings = positions(args.positions, args.plies, args.seed)
+    report = {
+        "meta": {"commit": git_commit(), "python": sys.version.split()[0],
+                 "platform": platform.platform(), "seed": args.seed,
+                 "positions": openings},
+        "backends": {},
+    }
+    for name in args.backends:
+        board_class = BACKENDS[name]
+        report["backends"][name] = {
+            "micro": bench_micro(board_class, openings, args.repeat, args.number),
+            "perft": bench_perft(board_class, openings, args.perft_depth),
+            "alphabeta": bench_search(board_class, openings, "alphabeta", args.search_depth, args.seed),
+            "minimax": bench_search(board_class, openings, "minimax", args.minimax_depth, args.seed),
+        }
+    return report
+
+
+def timings(report):
+    """Flatten a report into {(backend, benchmark): value} where lower
+    values are better.
+    """
+    flat = {}
+    for backend, results in report["backends"].items():
+        for name, result in results["micro"].items():
+            flat[(backend, name + " (us/call)")] = result["us_per_call"]
+        for name in ("perft", "alphabeta", "minimax"):
+            flat[(backend, name + " (us/node)")] = 1e6 / results[name]["nodes_per_second"]
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark isolation boards and agents.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--positions", type=int, default=5,
+                        help="Number of mid-game positions.")
+    parser.add_argument("--plies", type=int, default=10,
+                        help="Number of random moves played to reach each position.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timing runs per micro benchmark (the best is kept).")
+    parser.add_argument("--number", type=int, default=2000,
+                        help="Calls per timing run of each micro benchmark.")
+    parser.add_argument("--perft-depth", type=int, default=6)
+    parser.add_argument("--search-depth", type=int, default=7,
+                        help="Fixed alphabeta search depth.")
+    parser.add_argument("--minimax-depth", type=int, default=4,
+                        help="Fixed minimax search depth.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against.")
+    args = parser.parse_args()
+
+    report = run(args)
+    current = timings(report)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = timings(json.load(f))
+
+    print("{:<10}{:<28}{:>12}{:>12}".format("Backend", "Benchmark", "Time", "Ratio"))
+    for (backend, name), value in current.items():
+        ratio = value / baseline[(backend, name)] if (backend, name) in baseline else None
+        print("{:<10}{:<28}{:>12.3f}{:>12}".format(
+            backend, name, value, "-" if ratio is None else "{:.2f}x".format(ratio)))
+    for name, results in report["backends"].items():
+        print("{} perft({}) counts: {}".format(name, results["perft"]["depth"],
+                                              results["perft"]["counts"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
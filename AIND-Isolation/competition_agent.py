@@ -4,8 +4,17 @@ champions) in a tournament.
 
          COMPLETING AND SUBMITTING A COMPETITION AGENT IS OPTIONAL
 """
+import math
+import os
 import random
 
+import game_agent
+from game_agent import AlphaBetaPlayer
+from opening_book import BOOK_FILE, OpeningBook
+
+KNIGHT_MOVES = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                (1, -2), (1, 2), (2, -1), (2, 1)]
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -33,10 +42,211 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    return game_agent.custom_score(game, player)
+
+
+def random_rollout(game, legal_moves):
+    """Rollout policy that plays uniformly random moves. """
+    return random.choice(legal_moves)
+
+
+def mobility_rollout(game, legal_moves):
+    """Rollout policy that moves to the cell with the most open follow-up
+    moves, breaking ties at random.
+    """
+    best_moves, best_count = [], -1
+    for r, c in legal_moves:
+        count = sum(game.move_is_legal((r + dr, c + dc)) for dr, dc in KNIGHT_MOVES)
+        if count > best_count:
+            best_moves, best_count = [(r, c)], count
+        elif count == best_count:
+            best_moves.append((r, c))
+    return random.choice(best_moves)
+
+
+class MCTSNode:
+    """A node of the Monte Carlo search tree.
+
+    Parameters
+    ----------
+    move : (int, int)
+        The move that leads from the parent to this node.
+
+    parent : `MCTSNode`
+        The parent node, or None for the root.
+
+    player : object
+        The player that made `move`; `wins` are counted for this player.
+
+    legal_moves : list<(int, int)>
+        The moves available to the player to move at this node.
+    """
+    __slots__ = ("move", "parent", "player", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, player, legal_moves):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = {}
+        self.untried = legal_moves
+        self.visits = 0
+        self.wins = 0
+
+    def select(self, exploration):
+        """Return the child with the highest UCT value. """
+        log_visits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda n: n.wins / n.visits +
+                   exploration * math.sqrt(log_visits / n.visits))
+
+
+class MCTSPlayer:
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with the UCT selection rule.
+
+    The search tree is kept between moves: after each search the chosen child
+    becomes the new root, and on the next call the root is advanced along the
+    opponent's reply, so the statistics gathered for that line are reused
+    instead of rebuilt.
+
+    Parameters
+    ----------
+    rollout_policy : callable (optional)
+        A function (game, legal_moves) -> move used to play out each
+        simulated game; `random_rollout` is cheapest, `mobility_rollout`
+        plays more realistic games at a higher cost per playout.
+
+    exploration : float (optional)
+        The UCT exploration constant.
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is stopped.
+
+    Attributes
+    ----------
+    playouts : int
+        Number of playouts run by the most recent search.
+
+    playouts_per_second : float
+        Playout rate of the most recent search.
+
+    total_playouts : int
+        Running count of playouts over every search made by this player.
+    """
+
+    def __init__(self, rollout_policy=random_rollout, exploration=math.sqrt(2),
+                 timeout=10.):
+        self.rollout_policy = rollout_policy
+        self.exploration = exploration
+        self.time_left = None
+        self.TIMER_THRESHOLD = timeout
+        self.playouts = 0
+        self.playouts_per_second = 0.
+        self.total_playouts = 0
+        self._root = None
+        self._after_move = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move until the time limit is nearly reached.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            The most visited move at the root; (-1, -1) if there are no
+            available legal moves.
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            self._root = None
+            return (-1, -1)
+
+        root = self.__reuse_root(game)
+        if root is None:
+            random.shuffle(legal_moves)
+            root = MCTSNode(None, None, game.inactive_player, legal_moves)
+
+        start = time_left()
+        self.playouts = 0
+        while self.time_left() > self.TIMER_THRESHOLD:
+            self.__playout(root, game)
+            self.playouts += 1
+        elapsed = (start - self.time_left()) / 1000.
+        self.playouts_per_second = self.playouts / elapsed if elapsed > 0 else 0.
+        self.total_playouts += self.playouts
 
+        if not root.children:
+            self._root = None
+            return legal_moves[0]
+        best = max(root.children.values(), key=lambda n: n.visits)
+        best.parent = None
+        self._root = best
+        self._after_move = game.forecast_move(best.move)
+        return best.move
+
+    def __reuse_root(self, game):
+        """Return the subtree for the current position if the previous search
+        explored the opponent's reply, and None otherwise.
+        """
+        root, previous = self._root, self._after_move
+        self._root, self._after_move = None, None
+        if root is None or previous.move_count + 1 != game.move_count:
+            return None
+        reply = game.get_player_location(game.inactive_player)
+        node = root.children.get(reply)
+        if node is None or previous.forecast_move(reply).hash() != game.hash():
+            return None
+        node.parent = None
+        return node
+
+    def __playout(self, root, game):
+        """Run one selection, expansion, simulation and backpropagation step
+        from the root position.
+        """
+        state = game.copy()
+        node = root
 
-class CustomPlayer:
+        # selection
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            state.apply_move(node.move)
+
+        # expansion
+        if node.untried:
+            move = node.untried.pop()
+            state.apply_move(move)
+            child = MCTSNode(move, node, state.inactive_player, state.get_legal_moves())
+            random.shuffle(child.untried)
+            node.children[move] = child
+            node = child
+
+        # simulation
+        legal_moves = state.get_legal_moves()
+        while legal_moves:
+            state.apply_move(self.rollout_policy(state, legal_moves))
+            legal_moves = state.get_legal_moves()
+        loser = state.active_player
+
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if node.player != loser:
+                node.wins += 1
+            node = node.parent
+
+
+class CustomPlayer(AlphaBetaPlayer):
     """Game-playing agent to use in the optional player vs player Isolation
     competition.
 
@@ -52,19 +262,26 @@ class CustomPlayer:
     Parameters
     ----------
     data : string
-        The name of the search method to use in get_move().
+        The name of the search method to use in get_move(): "alphabeta"
+        (the default) or "mcts".
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted.  Note that
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    book : str (optional)
+        Path of an opening book built by `opening_book.py`. Book moves are
+        played without searching; the player searches normally once it
+        leaves the book, or throughout if the file does not exist.
     """
 
-    def __init__(self, data=None, timeout=1.):
-        self.score = custom_score
-        self.time_left = None
-        self.TIMER_THRESHOLD = timeout
+    def __init__(self, data=None, timeout=1., book=BOOK_FILE):
+        AlphaBetaPlayer.__init__(self, score_fn=custom_score, timeout=timeout,
+                                 tt_size=1 << 16, move_ordering=True, endgame=True)
+        self.book = OpeningBook(book) if book and os.path.exists(book) else None
+        self.mcts = MCTSPlayer(timeout=max(timeout, 10.)) if data == "mcts" else None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +310,10 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move is not None and move in game.get_legal_moves():
+                return move
+        if self.mcts is not None:
+            return self.mcts.get_move(game, time_left)
+        return AlphaBetaPlayer.get_move(self, game, time_left)
@@ -0,0 +1,165 @@
+"""This file contains an exact solver for isolation endgames in which the two
+players can no longer reach a common cell.
+
+Once the board is partitioned the players cannot interfere with each other,
+so the game reduces to two independent longest-path problems: each player
+can make exactly as many moves as the longest knight path through the open
+cells of its own region, and the player to move wins if and only if its path
+is strictly longer than the opponent's.  Path lengths are memoized by
+(start cell, open region bitmask), so a region is only ever solved once.
+"""
+from isolation import BitBoard
+from isolation.bitboard import board_tables, popcount
+
+# largest region (in open cells) the solver will attempt to search exactly
+MAX_REGION_CELLS = 24
+
+# cap on the number of memoized regions kept per board size
+MAX_CACHE_ENTRIES = 1 << 20
+
+# memoized longest path lengths keyed by (width, height), then (start, region)
+_PATH_CACHES = {}
+
+
+def reachable(start, open_mask, knight_masks):
+    """Return the mask of open cells reachable from `start` by a sequence of
+    knight moves through open cells.
+    """
+    region = 0
+    frontier = knight_masks[start] & open_mask
+    while frontier:
+        region |= frontier
+        expanded = 0
+        while frontier:
+            low = frontier & -frontier
+            expanded |= knight_masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = expanded & open_mask & ~region
+    return region
+
+
+def longest_path(start, region, knight_masks, cache, check=None):
+    """Return the number of moves in the longest knight path from `start`
+    that visits only cells of `region`, each at most once.
+
+    Parameters
+    ----------
+    start : int
+        Index of the cell the path starts from (not part of the path).
+
+    region : int
+        Bitmask of the open cells available to the path.
+
+    knight_masks : tuple<int>
+        The knight move mask of every cell (see `board_tables`).
+
+    cache : dict
+        Memo of previously solved (start, region) pairs.
+
+    check : callable (optional)
+        Called before expanding each unsolved position; used by the search
+        agents to abort the solver with `SearchTimeout`.
+    """
+    moves = knight_masks[start] & region
+    if not moves:
+        return 0
+    key = (start, region)
+    length = cache.get(key)
+    if length is not None:
+        return length
+    if check is not None:
+        check()
+    best = 0
+    upper_bound = popcount(region)
+    while moves:
+        low = moves & -moves
+        moves ^= low
+        length = 1 + longest_path(low.bit_length() - 1, region ^ low,
+                                  knight_masks, cache, check)
+        if length > best:
+            best = length
+            if best == upper_bound:
+                break
+    if len(cache) >= MAX_CACHE_ENTRIES:
+        cache.clear()
+    cache[key] = best
+    return best
+
+
+def _position(game):
+    """Return the open cell mask and the cell indices of the active and
+    inactive players, or None if either player has not moved yet.
+    """
+    active = game.get_player_location(game.active_player)
+    inactive = game.get_player_location(game.inactive_player)
+    if active is None or inactive is None:
+        return None
+    if isinstance(game, BitBoard):
+        open_mask = game._full_mask & ~game._blocked
+    else:
+        open_mask = 0
+        for r, c in game.get_blank_spaces():
+            open_mask |= 1 << (r + c * game.height)
+    return (open_mask, active[0] + active[1] * game.height,
+            inactive[0] + inactive[1] * game.height)
+
+
+def partition(game):
+    """Return the regions (active player's, inactive player's) reachable by
+    each player if no cell is reachable by both, and None otherwise.
+    """
+    position = _position(game)
+    if position is None:
+        return None
+    open_mask, active, inactive = position
+    _, knight_masks, _ = board_tables(game.width, game.height)
+    active_region = reachable(active, open_mask, knight_masks)
+    inactive_region = reachable(inactive, open_mask, knight_masks)
+    if active_region & inactive_region:
+        return None
+    return active_region, inactive_region
+
+
+def solve(game, max_cells=MAX_REGION_CELLS, check=None):
+    """Solve a partitioned position exactly.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The position to solve (either board backend).
+
+    max_cells : int (optional)
+        Give up (return None) if either region has more open cells.
+
+    check : callable (optional)
+        Passed to `longest_path` to allow the caller to abort the solver.
+
+    Returns
+    -------
+    (bool, (int, int)) or None
+        Whether the active player wins with best play and the move that
+        follows its longest path ((-1, -1) if it has no legal moves), or None
+        if the players are not separated or a region is too large.
+    """
+    regions = partition(game)
+    if regions is None:
+        return None
+    active_region, inactive_region = regions
+    if popcount(active_region) > max_cells or popcount(inactive_region) > max_cells:
+        return None
+
+    coords, knight_masks, _ = board_tables(game.width, game.height)
+    cache = _PATH_CACHES.setdefault((game.width, game.height), {})
+    _, active, inactive = _position(game)
+    opponent_length = longest_path(inactive, inactive_region, knight_masks, cache, check)
+
+    best_move, best_length = (-1, -1), 0
+    moves = knight_masks[active] & active_region
+    while moves:
+        low = moves & -moves
+        moves ^= low
+        idx = low.bit_length() - 1
+        length = 1 + longest_path(idx, active_region ^ low, knight_masks, cache, check)
+        if length > best_length:
+            best_move, best_length = coords[idx], length
+    return best_length > opponent_length, best_move
@@ -3,10 +3,33 @@ test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
 import math
+import multiprocessing
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
 from random import randint
 
+from endgame import solve as solve_endgame
+from isolation.bitboard import popcount
+from score_tables import mobility, outcome
+from search_stats import CountingScore, SearchStats
+from time_manager import TimeManager
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
 weights = [1, 1]
 
+# the terms of custom_score_3: before `phase` percent of the board is filled
+# the score weighs the mobility of both players, the distance between them,
+# the quality of the player's moves and a penalty for standing on a wall;
+# after it, only the mobility of both players (see tuning.py)
+Score3Weights = namedtuple("Score3Weights", ["own", "opp", "distance", "quality", "wall",
+                                             "phase", "late_own", "late_opp"])
+SCORE_3_WEIGHTS = Score3Weights(1., 1., 1., 1., 1., 40., 1., 2.)
+
+# mixed into transposition table keys when the searching agent moves second
+# so that entries scored from player 1's view are never reused as player 2
+PLAYER_2_KEY = 0x9E3779B97F4A7C15
+
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
     pass
@@ -43,21 +66,16 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    tables, own, opp, own_mask, opp_mask = mobility(game, player)
+    result = outcome(game, player, own_mask, opp_mask)
+    if result is not None:
+        return result
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = popcount(own_mask)
+    opp_moves = popcount(opp_mask)
 
-    w, h = game.width / 2., game.height / 2.
-    y, x = game.get_player_location(player)
-    y2, x2 = game.get_player_location(game.get_opponent(player))
-
-    distance_to_center = float((h - y)**2 + (w - x)**2)
-    opp_distance_to_center = float((h - y2)**2 + (w - x2)**2)
+    distance_to_center = tables.center_distance[own]
+    opp_distance_to_center = tables.center_distance[opp]
     return float((own_moves - opp_moves) + (opp_distance_to_center - distance_to_center)*0.634/(game.move_count))
 
 
@@ -83,18 +101,15 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    tables, own, _, own_mask, opp_mask = mobility(game, player)
+    result = outcome(game, player, own_mask, opp_mask)
+    if result is not None:
+        return result
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = popcount(own_mask)
+    opp_moves = popcount(opp_mask)
 
-    pos_y, pos_x = game.get_player_location(player)
-    number_of_boxes_to_center = abs(pos_x - math.ceil(game.width/2)) + \
-        abs(pos_y - math.ceil(game.height/2)) - 1
+    number_of_boxes_to_center = tables.center_steps[own]
 
     if percent_game_completed(0, 10, game):
         return 2*own_moves - 0.5*number_of_boxes_to_center
@@ -104,7 +119,7 @@ def custom_score_2(game, player):
         return 2*own_moves - opp_moves
 
 
-def custom_score_3(game, player):
+def custom_score_3(game, player, weights=SCORE_3_WEIGHTS):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -121,52 +136,41 @@ def custom_score_3(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    weights : `Score3Weights` (optional)
+        The weights of the terms and the phase threshold; bind other values
+        with `functools.partial` to use them as a `score_fn`.
+
     Returns
     -------
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
-
-    my_moves = game.get_legal_moves(player)
-    opponent_moves = game.get_legal_moves(game.get_opponent(player))
-    own_moves = len(my_moves)
-    opp_moves = len(opponent_moves)
-    moves_so_far = 0
-    for box in game._board_state:
-        if box == 1:
-            moves_so_far += 1    
-
-    w, h = game.get_player_location(game.get_opponent(player))
-    y, x = game.get_player_location(player)
-    distance_to_center = float((h - y)**2 + (w - x)**2)
-
-    wall_boxes = [(x, y) for x in (0, game.width-1) for y in range(game.width)] + \
-    [(x, y) for y in (0, game.height-1) for x in range(game.height)]
-
-    penalty = 0
-    if (x, y) in wall_boxes:
-        penalty -= 1
-
-    quality_of_move = 0
-    for move in my_moves:
-        y, x = move
-        dist = float((h - y)**2 + (w - x)**2)
-        if dist == 0:
-            quality_of_move += 1
-        else:
-            quality_of_move += 1/dist
-        if move in opponent_moves:
-            quality_of_move -= 1
-
-    if percent_game_completed(0, 40, game):
-        return float(own_moves - opp_moves - distance_to_center + quality_of_move + penalty)
-    else:       
-        return own_moves - 2*opp_moves
+    tables, own, opp, own_mask, opp_mask = mobility(game, player)
+    result = outcome(game, player, own_mask, opp_mask)
+    if result is not None:
+        return result
+
+    own_moves = popcount(own_mask)
+    opp_moves = popcount(opp_mask)
+    if not percent_game_completed(0, weights.phase, game):
+        return weights.late_own*own_moves - weights.late_opp*opp_moves
+
+    size = tables.size
+    distance_to_center = tables.cross_distance[own * size + opp]
+    penalty = -1 if tables.on_wall[own] else 0
+
+    # moves the opponent can also reach count against the player
+    quality_of_move = -popcount(own_mask & opp_mask)
+    quality = tables.move_quality
+    mask = own_mask
+    while mask:
+        low = mask & -mask
+        quality_of_move += quality[(low.bit_length() - 1) * size + opp]
+        mask ^= low
+
+    return float(weights.own*own_moves - weights.opp*opp_moves -
+                 weights.distance*distance_to_center + weights.quality*quality_of_move +
+                 weights.wall*penalty)
 
 
 class IsolationPlayer:
@@ -190,12 +194,39 @@ class IsolationPlayer:
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    stats : bool or `SearchStats` (optional)
+        Record per-move search statistics: True for a new `SearchStats`, or
+        an existing instance to collect into. Disabled by default.
+
+    Attributes
+    ----------
+    nodes_searched : int
+        Running count of the nodes expanded by this player's searches.
+
+    stats : `SearchStats` or None
+        The statistics being recorded, if enabled.
     """
-    def __init__(self, search_depth=3, score_fn=custom_score, timeout=50.):
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=50.,
+                 stats=None):
         self.search_depth = search_depth
         self.score = score_fn
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.nodes_searched = 0
+        self.stats = None
+        if stats:
+            self.enable_stats(stats if isinstance(stats, SearchStats) else None)
+
+    def enable_stats(self, stats=None):
+        """Start recording search statistics into `stats` (a new
+        `SearchStats` if None) and return it.
+        """
+        if isinstance(self.score, CountingScore):
+            self.score = self.score.score_fn
+        self.stats = stats if stats is not None else SearchStats()
+        self.score = CountingScore(self.score, self.stats)
+        return self.stats
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -233,6 +264,8 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        if self.stats is not None:
+            self.stats.start_move(self.nodes_searched)
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -241,34 +274,45 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            if self.stats is not None:
+                self.stats.end_depth(self.search_depth, self.nodes_searched)
+            return best_move
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        finally:
+            if self.stats is not None:
+                self.stats.end_move(self.nodes_searched)
+
         # Return the best move from the last completed search iteration
         return best_move
 
     def __min_value(self, game, depth):
         self.__check_time()
+        self.nodes_searched += 1
         if self.__is_terminal(game, depth):
             return self.score(game, self)
         min_val = float("inf")
         legal_moves = game.get_legal_moves()
         for move in legal_moves:
-            forecast = game.forecast_move(move)
-            min_val = min(min_val, self.__max_value(forecast, depth - 1))
+            game.push_move(move)
+            min_val = min(min_val, self.__max_value(game, depth - 1))
+            game.pop_move()
         return min_val
 
     def __max_value(self, game, depth):
         self.__check_time()
+        self.nodes_searched += 1
         if self.__is_terminal(game, depth):
             return self.score(game, self)
         max_val = float("-inf")
         legal_moves = game.get_legal_moves()
         for move in legal_moves:
-            forecast = game.forecast_move(move)
-            max_val = max(max_val, self.__min_value(forecast, depth - 1))
+            game.push_move(move)
+            max_val = max(max_val, self.__min_value(game, depth - 1))
+            game.pop_move()
         return max_val
 
     def __is_terminal(self, game, depth):
@@ -317,7 +361,14 @@ class MinimaxPlayer(IsolationPlayer):
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
-        vals = [(self.__min_value(game.forecast_move(m), depth - 1), m) for m in legal_moves]
+        # search a private copy of the root so moves made in place are never
+        # visible to the caller, even when the search is aborted by a timeout
+        game = game.copy()
+        vals = []
+        for m in legal_moves:
+            game.push_move(m)
+            vals.append((self.__min_value(game, depth - 1), m))
+            game.pop_move()
         _, move = max(vals)
         return move
 
@@ -326,8 +377,162 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    search_depth, score_fn, timeout, stats
+        See `IsolationPlayer`.
+
+    tt_size : int (optional)
+        Number of slots in the transposition table kept by this player. The
+        table persists across iterative deepening iterations and across the
+        moves of a game; a size of 0 disables it.
+
+    move_ordering : bool (optional)
+        Search the previous iteration's principal variation move first, then
+        the transposition table move, the killer moves of the current ply and
+        the remaining moves by history score. When False, moves are searched
+        in the order returned by `get_legal_moves()`.
+
+    endgame : bool (optional)
+        Once the players are walled off from each other, replace the search
+        with the exact solver in `endgame.py`, returning proven wins and
+        losses instead of heuristic scores.
+
+    time_manager : bool or `TimeManager` (optional)
+        Budget the time of each move and stop deepening when the next
+        iteration is not predicted to finish in time (see
+        `time_manager.py`); True uses a per-move `TimeManager`. Without one,
+        the search deepens until the turn's time runs out.
+
+    pvs : bool (optional)
+        Use principal variation search: the first move of each node is
+        searched with the full window and the others with a null window,
+        re-searching only those that turn out to improve on the best move.
+
+    aspiration : float (optional)
+        Half-width of the aspiration window. When set, each iterative
+        deepening iteration after the first searches a window centred on the
+        previous iteration's root value, and searches again with the window
+        opened on the failing side if the value falls outside it.
+
+    batch_leaves : bool (optional)
+        Score the children of the nodes one ply above the search horizon
+        with one vectorized call instead of searching each child (see
+        `batch_eval.py`); `score_fn` must then be a `batch_eval.BatchScore`.
+
+    ponder : bool (optional)
+        Take part in the pondering protocol of `Board.play`: while the
+        opponent thinks, search the position after its predicted reply in a
+        background process, and if the prediction is right, start the next
+        search from the depth pondered. Call `close()` to stop the process.
+
+    Attributes
+    ----------
+    root_value : float
+        The value of the root found by the last call to `alphabeta()`.
     """
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=50.,
+                 tt_size=0, move_ordering=False, endgame=False, stats=None,
+                 time_manager=None, pvs=False, aspiration=None, batch_leaves=False,
+                 ponder=False):
+        if batch_leaves and not hasattr(score_fn, "evaluate"):
+            raise ValueError("batch_leaves requires a batch_eval.BatchScore heuristic")
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout, stats)
+        self.time_manager = TimeManager() if time_manager is True else time_manager
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self._tt_salt = 0
+        self.move_ordering = move_ordering
+        self._pv_line = []
+        self._pv_table = []
+        self._killers = {}
+        self._history = [{}, {}]
+        self.endgame = endgame
+        self._root_moves = None
+        self.root_value = None
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.batch_leaves = batch_leaves
+        self.pondering = ponder
+        self.ponder_hits = 0
+        self._ponder_pool = None
+        self._ponder_stop = None
+        self._ponder_progress = None
+        self._ponder_task = None
+        self._ponder_result = None
+
+    def __getstate__(self):
+        # background processes cannot be pickled; a copy starts its own
+        state = self.__dict__.copy()
+        state.update(_ponder_pool=None, _ponder_stop=None, _ponder_progress=None,
+                     _ponder_task=None)
+        return state
+
+    def ponder(self, game):
+        """Start searching the position after the opponent's predicted reply
+        in the background (see `Board.play`). Returns immediately.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position after this player's move, with the opponent to move.
+        """
+        if not self.pondering:
+            return
+        replies = game.get_legal_moves()
+        if not replies:
+            return
+        # the reply expected by the last search, or any reply without one
+        reply = replies[0]
+        pv = self._pv_line
+        if (len(pv) > 1 and pv[0] == game.get_player_location(self) and
+                pv[1] in replies):
+            reply = pv[1]
+        if self._ponder_pool is None:
+            self._ponder_stop = multiprocessing.Value("b", False)
+            # set by the pondering process once it completes an iteration
+            self._ponder_progress = multiprocessing.Event()
+            score_fn = getattr(self.score, "score_fn", self.score)
+            options = dict(search_depth=self.search_depth, score_fn=score_fn,
+                           timeout=0., tt_size=self.tt.size if self.tt else 0,
+                           move_ordering=self.move_ordering, endgame=self.endgame,
+                           pvs=self.pvs, batch_leaves=self.batch_leaves)
+            self._ponder_pool = ProcessPoolExecutor(
+                1, initializer=_init_ponder_worker,
+                initargs=(options, self._ponder_stop, self._ponder_progress))
+        self._ponder_stop.value = False
+        self._ponder_progress.clear()
+        snapshot = _swap_players(game.forecast_move(reply), self, _SELF, _OPPONENT)
+        self._ponder_task = (reply, self._ponder_pool.submit(_ponder, snapshot))
+
+    def stop_pondering(self, move):
+        """Stop the background search started by `ponder()` and keep its
+        result if the opponent played the predicted reply.
+
+        Parameters
+        ----------
+        move : (int, int) or None
+            The reply the opponent actually played, or None if the game is
+            over.
+        """
+        if self._ponder_task is None:
+            return
+        reply, future = self._ponder_task
+        self._ponder_task = None
+        self._ponder_stop.value = True
+        result = future.result()
+        if move == reply and result is not None:
+            self.ponder_hits += 1
+            self._ponder_result = result
+
+    def close(self):
+        """Shut down the pondering process, if any. """
+        self.stop_pondering(None)
+        if self._ponder_pool is not None:
+            self._ponder_pool.shutdown()
+            self._ponder_pool = None
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -358,7 +563,29 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        if self.time_manager is not None:
+            time_left = self.time_manager.start_move(game, time_left, self.TIMER_THRESHOLD)
         self.time_left = time_left
+        if self.stats is None:
+            return self.__iterative_deepening(game)
+        self.stats.start_move(self.nodes_searched)
+        try:
+            return self.__iterative_deepening(game)
+        finally:
+            self.stats.end_move(self.nodes_searched)
+
+    def __iterative_deepening(self, game):
+        """Search to increasing depths until the time runs out and return
+        the best move of the deepest completed iteration.
+        """
+        # killer moves are specific to the plies of the previous search and
+        # history scores are aged so recent cutoffs dominate the ordering
+        self._pv_line = []
+        self._killers = {}
+        pondered, self._ponder_result = self._ponder_result, None
+        for history in self._history:
+            for move in history:
+                history[move] //= 2
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -367,55 +594,278 @@ class AlphaBetaPlayer(IsolationPlayer):
             best_move = legal_moves[randint(0, len(legal_moves)-1)]
         else:
             best_move = (-1, -1)
+
+        # a partitioned board is solved outright instead of searched
+        solved = self.__solve_endgame(game, 0) if self.endgame else None
+        if solved is not None and solved[1] != (-1, -1):
+            return solved[1]
+
+        # iterations deeper than the number of open cells repeat the same
+        # complete search and are not recorded as deeper
+        max_depth = len(game.get_blank_spaces()) if self.stats is not None else 0
+
+        depth = 1
+        if pondered is not None:
+            # resume from the deepest iteration completed while pondering,
+            # centring the aspiration window on its value
+            depth, best_move, self._pv_line, self.root_value = pondered
+            depth += 1
+
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            depth = 1
             while True:
-                current_move = self.alphabeta(game, depth)
+                if self.aspiration and depth > 1:
+                    current_move = self.__aspiration_search(game, depth)
+                else:
+                    current_move = self.alphabeta(game, depth)
                 if current_move == (-1, -1):
                     return best_move
                 else:
                     best_move = current_move
+                if self.stats is not None and depth <= max_depth:
+                    self.stats.end_depth(depth, self.nodes_searched)
+                if self.time_manager is not None:
+                    self.time_manager.iteration_done()
+                    if not self.time_manager.next_iteration_fits(depth + 1):
+                        return best_move
                 depth += 1
         except SearchTimeout:
             return best_move
         return best_move
 
-    def __max_value(self, game, depth, alpha, beta):
+    def __aspiration_search(self, game, depth):
+        """Search with a window around the previous iteration's value,
+        opening the window on the failing side if the value falls outside.
+        """
+        guess = self.root_value
+        if guess is None or abs(guess) == math.inf:
+            return self.alphabeta(game, depth)
+        alpha, beta = guess - self.aspiration, guess + self.aspiration
+        move = self.alphabeta(game, depth, alpha, beta)
+        if self.root_value <= alpha:
+            move = self.alphabeta(game, depth, float("-inf"), beta)
+        elif self.root_value >= beta:
+            move = self.alphabeta(game, depth, alpha, float("inf"))
+        return move
+
+    def __max_value(self, game, depth, alpha, beta, ply=0, on_pv=False):
         self.__check_time()
+        self.nodes_searched += 1
         best_move = (-1, -1)
+        if self.move_ordering:
+            self._pv_table[ply] = []
         if self.__is_terminal(game, depth):
             return (self.score(game, self), best_move)
+        # a root restricted to some of its moves must not be answered by the
+        # solver or the table, which both know about every move
+        restricted = ply == 0 and self._root_moves is not None
+        if self.endgame and depth > 1 and not restricted:
+            solved = self.__solve_endgame(game, depth)
+            if solved is not None:
+                return solved
+        hash_move = None
+        if self.tt is not None and not restricted:
+            key = game.hash() ^ self._tt_salt
+            cached, hash_move = self.__probe(key, depth, alpha, beta)
+            if cached is not None:
+                return cached
+            alpha_orig = alpha
         value = float("-inf")
         legal_moves = game.get_legal_moves()
-        for move in legal_moves:
-            result = self.__min_value(game.forecast_move(move), depth - 1, alpha, beta)
+        if restricted:
+            legal_moves = [m for m in legal_moves if m in self._root_moves]
+        pv_move = None
+        if self.move_ordering:
+            if on_pv and ply < len(self._pv_line):
+                pv_move = self._pv_line[ply]
+            legal_moves = self.__order_moves(legal_moves, ply, 0, pv_move, hash_move)
+        leaf_values = self.__score_children(game, legal_moves, ply) if depth == 1 else None
+        scout = False
+        for index, move in enumerate(legal_moves):
+            if leaf_values is not None:
+                # the children are leaves, already scored together
+                result = (leaf_values[index], (-1, -1))
+            else:
+                game.push_move(move)
+                if scout:
+                    # null window test of whether the move beats alpha; only
+                    # the moves that do are searched again with the full window
+                    result = self.__min_value(game, depth - 1, alpha,
+                                              math.nextafter(alpha, math.inf), ply + 1)
+                    if alpha < result[0] < beta:
+                        result = self.__min_value(game, depth - 1, alpha, beta, ply + 1)
+                else:
+                    result = self.__min_value(game, depth - 1, alpha, beta, ply + 1,
+                                              pv_move is not None and move == pv_move)
+                game.pop_move()
+                scout = self.pvs
             if result[0] > value:
                 value, _ = result
                 best_move = move
+                if self.move_ordering:
+                    self._pv_table[ply] = [move] + self._pv_table[ply + 1]
             if value >= beta:
-                return (value, best_move)
+                if self.stats is not None:
+                    self.stats.cutoff(index)
+                if self.move_ordering:
+                    self.__record_cutoff(move, ply, 0, depth)
+                break
             alpha = max(alpha, value)
+        if self.tt is not None and not restricted:
+            self.__store(key, depth, value, alpha_orig, beta, best_move)
         return (value, best_move)
 
-    def __min_value(self, game, depth, alpha, beta):
+    def __min_value(self, game, depth, alpha, beta, ply=0, on_pv=False):
         self.__check_time()
+        self.nodes_searched += 1
         best_move = (-1, -1)
+        if self.move_ordering:
+            self._pv_table[ply] = []
         if self.__is_terminal(game, depth):
             return (self.score(game, self), best_move)
+        if self.endgame and depth > 1:
+            solved = self.__solve_endgame(game, depth)
+            if solved is not None:
+                return solved
+        hash_move = None
+        if self.tt is not None:
+            key = game.hash() ^ self._tt_salt
+            cached, hash_move = self.__probe(key, depth, alpha, beta)
+            if cached is not None:
+                return cached
+            beta_orig = beta
         value = float("inf")
         legal_moves = game.get_legal_moves()
-        for move in legal_moves:
-            result = self.__max_value(game.forecast_move(move), depth - 1, alpha, beta)
+        pv_move = None
+        if self.move_ordering:
+            if on_pv and ply < len(self._pv_line):
+                pv_move = self._pv_line[ply]
+            legal_moves = self.__order_moves(legal_moves, ply, 1, pv_move, hash_move)
+        leaf_values = self.__score_children(game, legal_moves, ply) if depth == 1 else None
+        scout = False
+        for index, move in enumerate(legal_moves):
+            if leaf_values is not None:
+                # the children are leaves, already scored together
+                result = (leaf_values[index], (-1, -1))
+            else:
+                game.push_move(move)
+                if scout:
+                    result = self.__max_value(game, depth - 1,
+                                              math.nextafter(beta, -math.inf), beta, ply + 1)
+                    if alpha < result[0] < beta:
+                        result = self.__max_value(game, depth - 1, alpha, beta, ply + 1)
+                else:
+                    result = self.__max_value(game, depth - 1, alpha, beta, ply + 1,
+                                              pv_move is not None and move == pv_move)
+                game.pop_move()
+                scout = self.pvs
             if result[0] < value:
                 value, _ = result
                 best_move = move
+                if self.move_ordering:
+                    self._pv_table[ply] = [move] + self._pv_table[ply + 1]
             if value <= alpha:
-                return (value, best_move)
+                if self.stats is not None:
+                    self.stats.cutoff(index)
+                if self.move_ordering:
+                    self.__record_cutoff(move, ply, 1, depth)
+                break
             beta = min(beta, value)
+        if self.tt is not None:
+            self.__store(key, depth, value, alpha, beta_orig, best_move)
         return (value, best_move)
 
+    def __solve_endgame(self, game, depth):
+        """Return the proven (value, move) of a partitioned position, or None
+        if the players can still interact (or the solver ran out of time at
+        the root, where depth is 0).
+        """
+        # walls rarely close before a quarter of the board is filled, so skip
+        # the flood fills that would almost always come back empty
+        if 4 * game.move_count < game.width * game.height:
+            return None
+        try:
+            solved = solve_endgame(game, check=self.__check_time)
+        except SearchTimeout:
+            if depth:
+                raise
+            return None
+        if solved is None:
+            return None
+        active_wins, move = solved
+        if active_wins == (game.active_player == self):
+            return (float("inf"), move)
+        return (float("-inf"), move)
+
+    def __score_children(self, game, legal_moves, ply):
+        """Return the values of the children of a node one ply above the
+        horizon, scored in one vectorized call, or None when `batch_leaves`
+        is off.
+        """
+        if not self.batch_leaves:
+            return None
+        self.__check_time()
+        # every child counts as a searched node, as if it had been visited
+        self.nodes_searched += len(legal_moves)
+        if self.stats is not None:
+            self.stats.leaf_evals += len(legal_moves)
+        if self.move_ordering:
+            self._pv_table[ply + 1] = []
+        score = getattr(self.score, "score_fn", self.score)
+        return score.evaluate(game, self, legal_moves)
+
+    def __order_moves(self, legal_moves, ply, side, pv_move, hash_move):
+        """Sort moves so the previous iteration's principal variation move is
+        searched first, followed by the transposition table move, the killer
+        moves recorded at this ply and finally by history score.
+        """
+        killers = self._killers.get(ply, ())
+        history = self._history[side]
+        return sorted(legal_moves, reverse=True,
+                      key=lambda m: (m == pv_move, m == hash_move,
+                                     m in killers, history.get(m, 0)))
+
+    def __record_cutoff(self, move, ply, side, depth):
+        """Remember a move that caused a cutoff as a killer for its ply and
+        credit it in the history table of the side that played it.
+        """
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        history = self._history[side]
+        history[move] = history.get(move, 0) + depth * depth
+
+    def __probe(self, key, depth, alpha, beta):
+        """Look the position up in the transposition table.
+
+        Returns the stored (value, move) pair if the entry was searched at
+        least as deep and its bound settles the current window (or None),
+        together with the stored best move for ordering (or None).
+        """
+        entry = self.tt.probe(key)
+        if entry is None:
+            return None, None
+        _, stored_depth, value, bound, move = entry
+        if stored_depth >= depth and (
+                bound == EXACT or (bound == LOWER and value >= beta) or
+                (bound == UPPER and value <= alpha)):
+            return (value, move), move
+        return None, move
+
+    def __store(self, key, depth, value, alpha, beta, best_move):
+        """Record a search result with the bound implied by the window it
+        was searched with.
+        """
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, value, bound, best_move)
+
     def __is_terminal(self, game, depth):
         self.__check_time()
         if len(game.get_legal_moves()) != 0 and depth > 0:
@@ -426,7 +876,8 @@ class AlphaBetaPlayer(IsolationPlayer):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"),
+                  root_moves=None):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
 
@@ -454,6 +905,11 @@ class AlphaBetaPlayer(IsolationPlayer):
         beta : float
             Beta limits the upper bound of search on maximizing layers
 
+        root_moves : list<(int, int)> (optional)
+            Only search these moves at the root (used to split the root
+            between parallel workers). The value of the best of them is left
+            in `root_value`.
+
         Returns
         -------
         (int, int)
@@ -472,5 +928,255 @@ class AlphaBetaPlayer(IsolationPlayer):
                 testing.
         """  
         self.__check_time()
-        _, move = self.__max_value(game, depth, alpha, beta)
-        return move
\ No newline at end of file
+        # the agent is the active player at the root, so the parity of the
+        # move count tells which side of the board its table entries are for
+        self._tt_salt = PLAYER_2_KEY if game.move_count % 2 else 0
+        self._pv_table = [[] for _ in range(depth + 2)]
+        self._root_moves = root_moves
+        # moves are made and unmade in place on a private copy of the root
+        try:
+            self.root_value, move = self.__max_value(game.copy(), depth, alpha, beta, 0, True)
+        finally:
+            self._root_moves = None
+        if self.move_ordering:
+            self._pv_line = self._pv_table[0]
+        return move
+
+
+# markers standing in for the players of a position sent to a search worker
+_SELF, _OPPONENT = 1, 2
+
+# the searcher owned by a parallel search or pondering worker process
+_worker_searcher = None
+
+# set by the parent to stop a pondering worker process
+_ponder_stop_flag = None
+
+# set by a pondering worker process once it completes an iteration
+_ponder_progress = None
+
+
+def _init_search_worker(options):
+    """Create the searcher of a parallel search worker process. """
+    global _worker_searcher
+    _worker_searcher = AlphaBetaPlayer(**options)
+
+
+def _init_parallel_worker(options, ready):
+    """Create the searcher of a parallel search worker process, then wait
+    for the other workers of the pool to start.
+    """
+    _init_search_worker(options)
+    ready.wait()
+
+
+def _worker_ready():
+    return True
+
+
+def _swap_players(game, player, stand_in, opponent_stand_in):
+    """Return a copy of the game with `player` replaced by `stand_in` and its
+    opponent by `opponent_stand_in`.
+    """
+    game = game.copy()
+    for attr in ("_player_1", "_player_2", "_active_player", "_inactive_player"):
+        seat = stand_in if getattr(game, attr) == player else opponent_stand_in
+        setattr(game, attr, seat)
+    return game
+
+
+def _init_ponder_worker(options, stop, progress):
+    """Create the searcher of a pondering process and share the flag that
+    tells it to stop and the event it sets when it has a result.
+    """
+    global _ponder_stop_flag, _ponder_progress
+    _init_search_worker(options)
+    _ponder_stop_flag = stop
+    _ponder_progress = progress
+
+
+def _ponder(game):
+    """Deepen the search of the position until told to stop (or until the
+    search reaches the end of the game).
+
+    Returns the (depth, best move, principal variation, root value) of the
+    deepest completed iteration, or None if none completed.
+    """
+    searcher = _worker_searcher
+    game = _swap_players(game, _SELF, searcher, _OPPONENT)
+    stop = _ponder_stop_flag
+    searcher.time_left = lambda: -1. if stop.value else float("inf")
+    result = None
+    try:
+        for depth in range(1, len(game.get_blank_spaces()) + 1):
+            move = searcher.alphabeta(game, depth)
+            if move == (-1, -1):
+                break
+            result = (depth, move, list(searcher._pv_line), searcher.root_value)
+            _ponder_progress.set()
+    except SearchTimeout:
+        pass
+    return result
+
+
+def _search_root_moves(game, root_moves, deadline):
+    """Search the given root moves with iterative deepening until the
+    deadline (a `time.monotonic()` value) passes.
+
+    Returns a list of (depth, value, move) for every completed depth and the
+    number of nodes searched.
+    """
+    searcher = _worker_searcher
+    game = _swap_players(game, _SELF, searcher, _OPPONENT)
+    searcher.time_left = lambda: 1000 * (deadline - time.monotonic())
+    nodes = searcher.nodes_searched
+    results = []
+    try:
+        depth = 1
+        while True:
+            move = searcher.alphabeta(game, depth, root_moves=root_moves)
+            results.append((depth, searcher.root_value, move))
+            if abs(searcher.root_value) == float("inf") or depth >= len(game.get_blank_spaces()):
+                break
+            depth += 1
+    except SearchTimeout:
+        pass
+    return results, searcher.nodes_searched - nodes
+
+
+def _combine_reports(reports, open_cells):
+    """Combine the results of `_search_root_moves` from every worker.
+
+    A worker that proved the value of its share (every move lost, or the
+    search reached the end of the game) stops deepening, and its last
+    result stands at any deeper depth; the depth searched is the deepest
+    one that every other worker completed.
+
+    Returns the depth searched and the (depth, value, move) of the best
+    root move at that depth.
+    """
+    searching = [len(results) for results in reports
+                 if abs(results[-1][1]) != float("inf") and results[-1][0] < open_cells]
+    depth = min(searching) if searching else max(len(results) for results in reports)
+    best = max((results[min(depth, len(results)) - 1] for results in reports),
+               key=lambda result: result[1:])
+    return depth, best
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """Game-playing agent that splits the root moves of an iterative
+    deepening alpha-beta search between worker processes.
+
+    Each worker deepens its share of the root moves independently, keeping
+    its own transposition table between moves, and reports the value of its
+    best move at every completed depth. The move played is the best one at
+    the deepest depth that every worker completed before the deadline
+    (leaving out workers that proved the value of their moves early), or
+    any move proven to win. The worker processes start with the first move
+    searched, or beforehand with `start()`.
+
+    Parameters
+    ----------
+    search_depth, score_fn, timeout, tt_size, move_ordering, endgame, stats
+        See `AlphaBetaPlayer`; the search options are used by every worker.
+        Statistics record the nodes, completed depth and time of each move,
+        but not the evaluations and cutoffs made inside the workers.
+
+    workers : int (optional)
+        Number of worker processes. A single worker searches the whole root
+        out of process, which measures the overhead of the parallel search.
+
+    Attributes
+    ----------
+    completed_depths : list<int>
+        The depth every worker completed, for each move searched in parallel.
+    """
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=50.,
+                 tt_size=0, move_ordering=False, endgame=False, stats=None,
+                 workers=2):
+        AlphaBetaPlayer.__init__(self, search_depth, score_fn, timeout,
+                                 tt_size, move_ordering, endgame, stats)
+        self.workers = workers
+        self.completed_depths = []
+        self._options = dict(search_depth=search_depth, score_fn=score_fn,
+                             timeout=0., tt_size=tt_size,
+                             move_ordering=move_ordering, endgame=endgame)
+        self._pool = None
+
+    def __getstate__(self):
+        # worker pools cannot be pickled; a copy starts its own
+        state = AlphaBetaPlayer.__getstate__(self)
+        state["_pool"] = None
+        return state
+
+    def start(self):
+        """Start the worker processes and wait until every one of them is
+        ready. Called by the first move searched (and the first one after
+        `close()`); call it beforehand so that no timed move pays for
+        starting them.
+        """
+        if self._pool is not None:
+            return
+        ready = multiprocessing.Barrier(self.workers + 1)
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_parallel_worker,
+                                         initargs=(self._options, ready))
+        # the pool only starts a process when a task finds no idle worker,
+        # and each worker holds its task until all of them have started
+        futures = [self._pool.submit(_worker_ready) for _ in range(self.workers)]
+        ready.wait()
+        wait(futures)
+
+    def get_move(self, game, time_left):
+        """Search for the best move in parallel and return it before the time
+        limit expires (see `AlphaBetaPlayer.get_move`).
+        """
+        legal_moves = game.get_legal_moves(self)
+        if len(legal_moves) <= 1:
+            return AlphaBetaPlayer.get_move(self, game, time_left)
+        if self.stats is None:
+            return self.__parallel_search(game, time_left, legal_moves)
+        self.stats.start_move(self.nodes_searched)
+        try:
+            return self.__parallel_search(game, time_left, legal_moves)
+        finally:
+            self.stats.end_move(self.nodes_searched)
+
+    def __parallel_search(self, game, time_left, legal_moves):
+        """Split the root moves between the workers and combine their
+        results.
+        """
+        self.start()
+        deadline = time.monotonic() + (time_left() - self.TIMER_THRESHOLD) / 1000
+        snapshot = _swap_players(game, self, _SELF, _OPPONENT)
+        shares = [legal_moves[i::self.workers] for i in range(self.workers)]
+        futures = [self._pool.submit(_search_root_moves, snapshot, share, deadline)
+                   for share in shares if share]
+        done, _ = wait(futures, timeout=max(0., (time_left() - self.TIMER_THRESHOLD / 2) / 1000))
+
+        reports = []
+        for future in done:
+            results, nodes = future.result()
+            self.nodes_searched += nodes
+            reports.append(results)
+        if len(reports) < len(futures) or not all(reports):
+            return legal_moves[randint(0, len(legal_moves) - 1)]
+        for results in reports:
+            depth, value, move = results[-1]
+            if value == float("inf"):
+                return move
+        depth, (_, _, move) = _combine_reports(reports, len(game.get_blank_spaces()))
+        self.completed_depths.append(depth)
+        if self.stats is not None:
+            self.stats.end_depth(depth, self.nodes_searched)
+        if move == (-1, -1):
+            # every root move loses; any of them will do
+            return legal_moves[randint(0, len(legal_moves) - 1)]
+        return move
+
+    def close(self):
+        """Shut down the worker processes. """
+        AlphaBetaPlayer.close(self)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,232 @@
+"""Write and read compact binary records of isolation games.
+
+A record file is a magic string followed by any number of games appended
+one after another, so a tournament can append each game as it finishes and
+a file can be extended by later runs. Every game is stored as (little
+endian):
+
+    header : width (uint8), height (uint8), winner (uint8, 0 if player 1
+             won and 1 if player 2 won), termination (uint8, an index into
+             TERMINATIONS), seed (uint64), number of moves (uint16), length
+             of each agent name (2 x uint8)
+    names  : the names of player 1 and player 2, utf-8 encoded
+    moves  : one byte per move, the cell index (row + col * height) of
+             every move from the first, alternating between the players
+
+A 7x7 game of 40 moves takes 70 bytes. The readers work directly on the
+bytes of the file: `read_games` yields one `GameRecord` per game, `replay`
+steps a board through a record, and `iter_positions` (as integer bitmasks)
+and `load_positions` (as NumPy arrays filled a game at a time) produce
+every position of every game with its outcome, the inputs for fitting a
+heuristic, without building boards.
+
+Usage:
+
+    python game_records.py games.bin
+"""
+import argparse
+import mmap
+import struct
+
+from collections import namedtuple
+
+import numpy as np
+
+from isolation import BitBoard
+
+MAGIC = b"ISOG"
+HEADER = struct.Struct("<BBBBQHBB")
+
+# the termination reasons returned by `Board.play`; a game that ends
+# normally is reported as an "illegal move" by the player left without moves
+TERMINATIONS = ("illegal move", "timeout", "forfeit")
+
+GameRecord = namedtuple("GameRecord", ["width", "height", "names", "winner",
+                                       "termination", "seed", "moves"])
+
+
+def encode_move(move, height):
+    """Return the cell index of a (row, column) move. """
+    return move[0] + move[1] * height
+
+
+class GameWriter:
+    """Append games to a record file, creating it if needed.
+
+    Parameters
+    ----------
+    path : str
+        Location of the record file.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self.games = 0
+
+    def write(self, width, height, names, winner, termination, seed, moves):
+        """Append one game.
+
+        Parameters
+        ----------
+        width, height : int
+            The size of the board (at most 256 cells).
+
+        names : (str, str)
+            The names of player 1 and player 2.
+
+        winner : int
+            0 if player 1 won and 1 if player 2 won.
+
+        termination : str
+            The reason the game ended, one of TERMINATIONS.
+
+        seed : int
+            The seed the game was played with (0 if unknown).
+
+        moves : list<(int, int)>
+            Every move of the game, from the first.
+        """
+        names = [name.encode("utf-8")[:255] for name in names]
+        data = bytes(encode_move(move, height) for move in moves)
+        self._file.write(HEADER.pack(width, height, winner, TERMINATIONS.index(termination),
+                                     seed & 0xFFFFFFFFFFFFFFFF, len(data),
+                                     len(names[0]), len(names[1])))
+        self._file.write(names[0] + names[1] + data)
+        self._file.flush()
+        self.games += 1
+
+    def close(self):
+        self._file.close()
+
+
+def read_games(path):
+    """Yield a `GameRecord` for every game in a record file; the moves of
+    each record are the `bytes` of its cell indices.
+    """
+    with open(path, "rb") as f:
+        if not f.read(len(MAGIC)):
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("{} is not an isolation game record file".format(path))
+        offset = len(MAGIC)
+        while offset < len(data):
+            width, height, winner, termination, seed, count, len_1, len_2 = \
+                HEADER.unpack_from(data, offset)
+            offset += HEADER.size
+            names = (data[offset:offset + len_1].decode("utf-8"),
+                     data[offset + len_1:offset + len_1 + len_2].decode("utf-8"))
+            offset += len_1 + len_2
+            yield GameRecord(width, height, names, winner, TERMINATIONS[termination],
+                             seed, data[offset:offset + count])
+            offset += count
+    finally:
+        data.close()
+
+
+def replay(record, board_class=BitBoard, player_1="player 1", player_2="player 2"):
+    """Yield the board before each move of a game and the move played from
+    it. The same board is updated in place between steps, and holds the
+    final position once the record is exhausted.
+    """
+    game = board_class(player_1, player_2, record.width, record.height)
+    for cell in record.moves:
+        move = (cell % record.height, cell // record.height)
+        yield game, move
+        game.apply_move(move)
+
+
+def iter_positions(path, terminations=("illegal move",)):
+    """Yield every position of every game that ended with one of the given
+    terminations, as integers:
+
+        (width, height, blocked mask, active player's cell, inactive
+         player's cell, move count, outcome)
+
+    Cells are None for players that have not moved, and the outcome is 1 if
+    the player to move went on to win the game and -1 otherwise.
+    """
+    for record in read_games(path):
+        if record.termination not in terminations:
+            continue
+        blocked = 0
+        cells = [None, None]
+        for ply, cell in enumerate(record.moves):
+            seat = ply % 2
+            outcome = 1 if record.winner == seat else -1
+            yield (record.width, record.height, blocked, cells[seat], cells[1 - seat],
+                   ply, outcome)
+            blocked |= 1 << cell
+            cells[seat] = cell
+
+
+def load_positions(path, width=7, height=7, terminations=("illegal move",)):
+    """Return the positions of every game of the given board size in which
+    both players have moved, as NumPy arrays of one row per position:
+
+        open_cells  : (n, cells) bool, the open cells
+        active      : (n,) int, the cell of the player to move
+        inactive    : (n,) int, the cell of the other player
+        move_count  : (n,) int, the number of moves played
+        outcome     : (n,) int, 1 if the player to move won and -1 otherwise
+    """
+    size = width * height
+
+    def games():
+        for record in read_games(path):
+            if ((record.width, record.height) == (width, height) and
+                    record.termination in terminations and len(record.moves) > 2):
+                yield record
+
+    # a first pass over the headers sizes the arrays, a second fills them
+    # one game at a time
+    count = sum(len(record.moves) - 2 for record in games())
+    open_cells = np.empty((count, size), dtype=bool)
+    active = np.empty(count, dtype=int)
+    inactive = np.empty(count, dtype=int)
+    move_count = np.empty(count, dtype=int)
+    outcome = np.empty(count, dtype=int)
+    row = 0
+    for record in games():
+        moves = np.frombuffer(record.moves, dtype=np.uint8)
+        plies = np.arange(2, len(moves))
+        rows = slice(row, row + len(plies))
+        # row k of the running union holds the cells of the first k + 1 moves
+        played = np.zeros((len(moves), size), dtype=bool)
+        played[np.arange(len(moves)), moves] = True
+        open_cells[rows] = ~np.logical_or.accumulate(played, axis=0)[1:-1]
+        active[rows] = moves[:-2]
+        inactive[rows] = moves[1:-1]
+        move_count[rows] = plies
+        outcome[rows] = np.where(plies % 2 == record.winner, 1, -1)
+        row += len(plies)
+    return {"open_cells": open_cells, "active": active, "inactive": inactive,
+            "move_count": move_count, "outcome": outcome}
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize an isolation game record file.")
+    parser.add_argument("path", help="Game record file.")
+    args = parser.parse_args()
+
+    games = 0
+    moves = 0
+    wins = {}
+    terminations = dict.fromkeys(TERMINATIONS, 0)
+    for record in read_games(args.path):
+        games += 1
+        moves += len(record.moves)
+        terminations[record.termination] += 1
+        for seat, name in enumerate(record.names):
+            won, played = wins.get(name, (0, 0))
+            wins[name] = (won + (record.winner == seat), played + 1)
+    print("{} games, {:.1f} moves per game".format(games, moves / max(1, games)))
+    print("Terminations: " + ", ".join("{} {}".format(n, t) for t, n in terminations.items()))
+    for name, (won, played) in sorted(wins.items()):
+        print("{:<20} won {} of {}".format(name, won, played))
+
+
+if __name__ == "__main__":
+    main()
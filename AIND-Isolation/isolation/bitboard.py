@@ -0,0 +1,305 @@
+"""
+This file contains the `BitBoard` class, an alternative backend for the
+isolation `Board` that stores the blocked cells and both player locations as
+integer bitmasks instead of a Python list.
+
+Cells are indexed exactly like `Board._board_state` (index = row + col *
+height), so bit `i` of each mask corresponds to entry `i` of the list
+representation.  Knight-move masks are computed once for each board size and
+shared by every board of that size, so move generation is a single mask
+operation and copying a board only duplicates a handful of integers.
+"""
+import random
+
+from .isolation import Board, zobrist_keys
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+# cache of per-size lookup tables keyed by (width, height)
+_TABLES = {}
+
+
+def popcount(mask):
+    """Return the number of cells set in a bitmask. """
+    return bin(mask).count("1")
+
+
+def board_tables(width, height):
+    """Return the lookup tables shared by every board of the given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+
+    Returns
+    -------
+    (tuple, tuple, int)
+        The (row, column) coordinate pair for every cell index, the knight
+        move mask for every cell index, and the mask with every cell set.
+    """
+    key = (width, height)
+    if key not in _TABLES:
+        coords = tuple((idx % height, idx // height)
+                       for idx in range(width * height))
+        masks = []
+        for r, c in coords:
+            mask = 0
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            masks.append(mask)
+        _TABLES[key] = (coords, tuple(masks), (1 << (width * height)) - 1)
+    return _TABLES[key]
+
+
+class BitBoard(Board):
+    """Implement the isolation `Board` API using integer bitmasks.
+
+    The public interface (`get_legal_moves`, `forecast_move`, `utility`,
+    `get_player_location`, `play`, ...) is identical to `Board`, so any agent
+    written against `Board` can play on a `BitBoard` unchanged.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        # Board.__init__ is deliberately not called; it would allocate the
+        # list representation that this class replaces
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+        self._coords, self._knight_masks, self._full_mask = board_tables(width, height)
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._undo_stack = []
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
+    def hash(self):
+        """Return the Zobrist hash of the current state (see `Board.hash`);
+        a `BitBoard` and a `Board` holding the same position hash equally.
+        """
+        return self._hash
+
+    def _zobrist_hash(self):
+        """Compute the Zobrist hash of the current state from scratch. """
+        cells, player_1, player_2, side = self._zobrist
+        h = side if self.move_count & 1 else 0
+        for idx in range(self.width * self.height):
+            if self._blocked >> idx & 1:
+                h ^= cells[idx]
+        if self._p1_loc != Board.NOT_MOVED:
+            h ^= player_1[self._p1_loc]
+        if self._p2_loc != Board.NOT_MOVED:
+            h ^= player_2[self._p2_loc]
+        return h
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.__dict__ = self.__dict__.copy()
+        new_board._undo_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        r, c = move
+        return (0 <= r < self.height and 0 <= c < self.width and
+                not self._blocked >> (r + c * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self.__mask_to_moves(self._full_mask & ~self._blocked)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        if player == self._player_1:
+            idx = self._p1_loc
+        elif player == self._player_2:
+            idx = self._p2_loc
+        else:
+            raise RuntimeError(
+                "Invalid player in get_player_location: {}".format(player))
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._p1_loc if player == self._player_1 else self._p2_loc
+        if idx == Board.NOT_MOVED:
+            return self.get_blank_spaces()
+        moves = self.__mask_to_moves(self._knight_masks[idx] & ~self._blocked)
+        random.shuffle(moves)
+        return moves
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        cells, player_1, player_2, side = self._zobrist
+        h = self._hash ^ cells[idx] ^ side
+        if self._active_player == self._player_2:
+            if self._p2_loc != Board.NOT_MOVED:
+                h ^= player_2[self._p2_loc]
+            self._p2_loc = idx
+            h ^= player_2[idx]
+        else:
+            if self._p1_loc != Board.NOT_MOVED:
+                h ^= player_1[self._p1_loc]
+            self._p1_loc = idx
+            h ^= player_1[idx]
+        self._hash = h
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move in place, recording the previous state for
+        `pop_move()` (see `Board.push_move`).
+        """
+        self._undo_stack.append((self._blocked, self._p1_loc, self._p2_loc, self._hash))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the most recent move applied with `push_move()`. """
+        self._blocked, self._p1_loc, self._p2_loc, self._hash = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self.__moves_mask(self._active_player)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self.__moves_mask(self._active_player)
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player (see `Board.utility`).
+        """
+        if not self.__moves_mask(self._active_player):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def __moves_mask(self, player):
+        """Return the bitmask of open cells the player can move to. """
+        idx = self._p1_loc if player == self._player_1 else self._p2_loc
+        if idx == Board.NOT_MOVED:
+            return self._full_mask & ~self._blocked
+        return self._knight_masks[idx] & ~self._blocked
+
+    def __mask_to_moves(self, mask):
+        """Convert a cell bitmask into a list of (row, column) pairs in
+        ascending index order.
+        """
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif self._p1_loc == idx:
+                    out += symbols[0]
+                elif self._p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
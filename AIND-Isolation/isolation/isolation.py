@@ -13,6 +13,34 @@ from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# cache of per-size Zobrist keys keyed by (width, height)
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the Zobrist hashing keys for a board of the given size.
+
+    The keys are drawn from a generator seeded by the board size, so every
+    board (and every process) of the same size agrees on the hash of a
+    position.
+
+    Returns
+    -------
+    (tuple, tuple, tuple, int)
+        One 64-bit key per cell for blocked cells, one per cell for the
+        location of player 1, one per cell for the location of player 2, and
+        the key toggled each time the initiative passes to the other player.
+    """
+    key = (width, height)
+    if key not in _ZOBRIST_KEYS:
+        rng = random.Random(width * 1009 + height)
+        size = width * height
+        cells = tuple(rng.getrandbits(64) for _ in range(size))
+        player_1 = tuple(rng.getrandbits(64) for _ in range(size))
+        player_2 = tuple(rng.getrandbits(64) for _ in range(size))
+        _ZOBRIST_KEYS[key] = (cells, player_1, player_2, rng.getrandbits(64))
+    return _ZOBRIST_KEYS[key]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -52,8 +80,33 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # moves applied by push_move() that can be reverted by pop_move()
+        self._undo_stack = []
+
+        # Zobrist hash of the current state, updated incrementally by
+        # apply_move(); the empty board with player 1 to move hashes to 0
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the Zobrist hash of the current state. The hash covers the
+        blocked cells, both player locations and the player with initiative,
+        and is maintained incrementally so this call is O(1).
+        """
+        return self._hash
+
+    def _zobrist_hash(self):
+        """Compute the Zobrist hash of the current state from scratch. """
+        cells, player_1, player_2, side = self._zobrist
+        h = side if self._board_state[-3] else 0
+        for idx in range(self.width * self.height):
+            if self._board_state[idx] != Board.BLANK:
+                h ^= cells[idx]
+        if self._board_state[-1] != Board.NOT_MOVED:
+            h ^= player_1[self._board_state[-1]]
+        if self._board_state[-2] != Board.NOT_MOVED:
+            h ^= player_2[self._board_state[-2]]
+        return h
 
     @property
     def active_player(self):
@@ -97,6 +150,7 @@ class Board(object):
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self._hash
         return new_board
 
     def forecast_move(self, move):
@@ -118,6 +172,31 @@ class Board(object):
         new_board.apply_move(move)
         return new_board
 
+    def push_move(self, move):
+        """Apply a move to the current game in place and record what is
+        needed to revert it with `pop_move()`. This is the allocation-free
+        alternative to `forecast_move()` for search algorithms.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._undo_stack.append((idx, last_move_idx, self._board_state[-last_move_idx], self._hash))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the most recent move applied with `push_move()`. """
+        idx, last_move_idx, last_move, self._hash = self._undo_stack.pop()
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = last_move
+        self._board_state[-3] ^= 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
     def move_is_legal(self, move):
         """Test whether a move is legal in the current game state.
 
@@ -201,6 +280,12 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        cells, player_1, player_2, side = self._zobrist
+        location_keys = player_2 if last_move_idx == 2 else player_1
+        last_move = self._board_state[-last_move_idx]
+        if last_move != Board.NOT_MOVED:
+            self._hash ^= location_keys[last_move]
+        self._hash ^= cells[idx] ^ location_keys[idx] ^ side
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
@@ -295,7 +380,8 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, timer=timeit.default_timer,
+             game_time=None, ponder=False):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -305,6 +391,29 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        timer : callable (optional)
+            A function returning the current time in seconds that is used to
+            measure each turn, e.g. `time.process_time` to charge each player
+            only for the CPU time of the current process.
+
+        game_time : numeric (optional)
+            If given, each player has a clock of this many milliseconds for
+            the whole game instead of `time_limit` per turn; `time_left`
+            reports the time remaining on the clock of the player to move,
+            and running out of it is a timeout.
+
+        ponder : bool (optional)
+            Enable the pondering protocol for players that implement it.
+            After a player chooses a move, and still on its own clock, its
+            `ponder(game)` method is called with the position after the move
+            and may start thinking in the background while the opponent
+            moves. At the start of its next turn, again on its own clock,
+            `stop_pondering(move)` is called with the opponent's reply (or
+            None when the game ends) and must stop the background work.
+            Players should ponder in another process: with
+            `timer=time.process_time`, the opponent is then only charged for
+            its own CPU time.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -314,29 +423,47 @@ class Board(object):
         """
         move_history = []
 
-        time_millis = lambda: 1000 * timeit.default_timer()
-
-        while True:
-
-            legal_player_moves = self.get_legal_moves()
-            game_copy = self.copy()
-
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
-            curr_move = self._active_player.get_move(game_copy, time_left)
-            move_end = time_left()
-
-            if curr_move is None:
-                curr_move = Board.NOT_MOVED
-
-            if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
-
-            if curr_move not in legal_player_moves:
-                if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
-
-            move_history.append(list(curr_move))
-
-            self.apply_move(curr_move)
+        time_millis = lambda: 1000 * timer()
+        # remaining game time of player 1 and player 2, who move on even and
+        # odd move counts respectively
+        clocks = [game_time, game_time]
+
+        # players pondering during their opponent's turn
+        pondering = []
+        try:
+            while True:
+
+                legal_player_moves = self.get_legal_moves()
+                game_copy = self.copy()
+
+                seat = self.move_count % 2
+                turn_limit = time_limit if game_time is None else clocks[seat]
+                move_start = time_millis()
+                time_left = lambda : turn_limit - (time_millis() - move_start)
+                if self._active_player in pondering:
+                    pondering.remove(self._active_player)
+                    self._active_player.stop_pondering(tuple(move_history[-1]))
+                curr_move = self._active_player.get_move(game_copy, time_left)
+                if ponder and curr_move in legal_player_moves and hasattr(self._active_player, "ponder"):
+                    self._active_player.ponder(self.forecast_move(curr_move))
+                    pondering.append(self._active_player)
+                move_end = time_left()
+                clocks[seat] = move_end
+
+                if curr_move is None:
+                    curr_move = Board.NOT_MOVED
+
+                if move_end < 0:
+                    return self._inactive_player, move_history, "timeout"
+
+                if curr_move not in legal_player_moves:
+                    if len(legal_player_moves) > 0:
+                        return self._inactive_player, move_history, "forfeit"
+                    return self._inactive_player, move_history, "illegal move"
+
+                move_history.append(list(curr_move))
+
+                self.apply_move(curr_move)
+        finally:
+            for player in pondering:
+                player.stop_pondering(None)
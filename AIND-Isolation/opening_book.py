@@ -0,0 +1,233 @@
+"""Build and read opening books for isolation.
+
+The builder enumerates every position of the first few plies of a game,
+reduces them to one canonical representative under the symmetries of the
+board (8 for square boards, 4 otherwise), searches each representative to a
+fixed depth with `AlphaBetaPlayer.alphabeta`, and writes the best moves to a
+compact open-addressed hash table on disk.  `OpeningBook` maps that file into
+memory and answers lookups in O(1) without reading the whole table.
+
+File format (little endian):
+
+    header  : magic b"ISOB", width (uint16), height (uint16), slots (uint32)
+    slots   : key (uint64), move cell index (uint8), search depth (uint8)
+
+Empty slots hold the key 0xFFFFFFFFFFFFFFFF. Keys pack the blocked cell mask
+with the cell indices (+1, 0 when not placed) of the active and inactive
+players, so they fit in 64 bits for boards of up to 50 cells.
+
+Usage:
+
+    python opening_book.py --plies 4 --depth 6 --output opening_book.bin
+"""
+import argparse
+import mmap
+import os
+import struct
+import timeit
+
+import game_agent
+from isolation import BitBoard
+
+MAGIC = b"ISOB"
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<QBB")
+EMPTY_KEY = 0xFFFFFFFFFFFFFFFF
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+# cache of symmetry permutations keyed by (width, height)
+_SYMMETRIES = {}
+
+
+def symmetries(width, height):
+    """Return the cell permutations of every symmetry of the board.
+
+    Each permutation is a tuple mapping a cell index (row + col * height) to
+    the index of the cell it is moved to. Knight moves are preserved by all
+    of them, so symmetric positions have symmetric game trees.
+    """
+    key = (width, height)
+    if key not in _SYMMETRIES:
+        h, w = height - 1, width - 1
+        transforms = [lambda r, c: (r, c), lambda r, c: (r, w - c),
+                      lambda r, c: (h - r, c), lambda r, c: (h - r, w - c)]
+        if width == height:
+            transforms += [lambda r, c: (c, r), lambda r, c: (c, h - r),
+                           lambda r, c: (w - c, r), lambda r, c: (w - c, h - r)]
+        perms = []
+        for transform in transforms:
+            perm = []
+            for idx in range(width * height):
+                r, c = transform(idx % height, idx // height)
+                perm.append(r + c * height)
+            perms.append(tuple(perm))
+        _SYMMETRIES[key] = perms
+    return _SYMMETRIES[key]
+
+
+def position(game):
+    """Return the (blocked mask, active cell, inactive cell) of a game, with
+    cells as indices and None for players that have not moved.
+    """
+    if isinstance(game, BitBoard):
+        blocked = game._blocked
+    else:
+        blocked = (1 << (game.width * game.height)) - 1
+        for r, c in game.get_blank_spaces():
+            blocked ^= 1 << (r + c * game.height)
+    cells = []
+    for player in (game.active_player, game.inactive_player):
+        loc = game.get_player_location(player)
+        cells.append(None if loc is None else loc[0] + loc[1] * game.height)
+    return blocked, cells[0], cells[1]
+
+
+def pack(blocked, active, inactive, size):
+    """Pack a position into a single integer key. """
+    active = 0 if active is None else active + 1
+    inactive = 0 if inactive is None else inactive + 1
+    return blocked | (active << size) | (inactive << (size + 7))
+
+
+def canonical_key(game):
+    """Return the smallest key among all symmetric images of the position
+    and the permutation that produces it.
+    """
+    blocked, active, inactive = position(game)
+    size = game.width * game.height
+    best = None
+    for perm in symmetries(game.width, game.height):
+        image = 0
+        mask = blocked
+        while mask:
+            low = mask & -mask
+            image |= 1 << perm[low.bit_length() - 1]
+            mask ^= low
+        key = pack(image,
+                   None if active is None else perm[active],
+                   None if inactive is None else perm[inactive], size)
+        if best is None or key < best[0]:
+            best = (key, perm)
+    return best
+
+
+def _slot(key, slots):
+    return ((key * HASH_MULTIPLIER) & EMPTY_KEY) % slots
+
+
+def write_book(path, width, height, entries):
+    """Write a {canonical key: (move cell index, depth)} dict to disk. """
+    slots = max(1, 2 * len(entries))
+    data = bytearray(HEADER.size + slots * RECORD.size)
+    HEADER.pack_into(data, 0, MAGIC, width, height, slots)
+    for idx in range(slots):
+        RECORD.pack_into(data, HEADER.size + idx * RECORD.size, EMPTY_KEY, 0, 0)
+    for key, (move, depth) in entries.items():
+        idx = _slot(key, slots)
+        while RECORD.unpack_from(data, HEADER.size + idx * RECORD.size)[0] != EMPTY_KEY:
+            idx = (idx + 1) % slots
+        RECORD.pack_into(data, HEADER.size + idx * RECORD.size, key, move, depth)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class OpeningBook:
+    """Read-only opening book backed by a memory-mapped file.
+
+    Parameters
+    ----------
+    path : str
+        Location of a book written by `write_book`.
+    """
+
+    def __init__(self, path=BOOK_FILE):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.slots = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("{} is not an isolation opening book".format(path))
+
+    def __len__(self):
+        return sum(1 for idx in range(self.slots)
+                   if RECORD.unpack_from(self._map, HEADER.size + idx * RECORD.size)[0] != EMPTY_KEY)
+
+    def lookup(self, game):
+        """Return the book move for the active player, or None if the
+        position is not in the book.
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        key, perm = canonical_key(game)
+        idx = _slot(key, self.slots)
+        while True:
+            stored, move, _ = RECORD.unpack_from(self._map, HEADER.size + idx * RECORD.size)
+            if stored == EMPTY_KEY:
+                return None
+            if stored == key:
+                # the stored move is in the canonical frame; map it back
+                cell = perm.index(move)
+                return (cell % game.height, cell // game.height)
+            idx = (idx + 1) % self.slots
+
+    def close(self):
+        self._map.close()
+
+
+def build_book(plies, depth, score_fn, width=7, height=7, verbose=True):
+    """Search every canonical position of the first `plies` plies to `depth`.
+
+    Returns
+    -------
+    dict
+        {canonical key: (best move cell index in the canonical frame, depth)}
+    """
+    players = [game_agent.AlphaBetaPlayer(score_fn=score_fn, tt_size=1 << 18,
+                                          move_ordering=True) for _ in range(2)]
+    for player in players:
+        player.time_left = lambda: float("inf")
+    entries = {}
+    frontier = [BitBoard(players[0], players[1], width, height)]
+    for ply in range(plies):
+        start = timeit.default_timer()
+        children = {}
+        for game in frontier:
+            key, perm = canonical_key(game)
+            move = game.active_player.alphabeta(game, depth)
+            if move != (-1, -1):
+                entries[key] = (perm[move[0] + move[1] * height], depth)
+            for child_move in game.get_legal_moves():
+                child = game.forecast_move(child_move)
+                children.setdefault(canonical_key(child)[0], child)
+        if verbose:
+            print("ply {}: {} positions searched in {:.1f}s".format(
+                ply, len(frontier), timeit.default_timer() - start))
+        frontier = list(children.values())
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an isolation opening book.")
+    parser.add_argument("--plies", type=int, default=4,
+                        help="Number of plies from the start of the game to cover.")
+    parser.add_argument("--depth", type=int, default=6,
+                        help="Fixed alpha-beta search depth for every book position.")
+    parser.add_argument("--score", default="custom_score",
+                        help="Name of the heuristic in game_agent.py.")
+    parser.add_argument("--size", type=int, nargs=2, default=[7, 7], metavar=("WIDTH", "HEIGHT"),
+                        help="Board width and height.")
+    parser.add_argument("--output", default=BOOK_FILE, help="Book file to write.")
+    args = parser.parse_args()
+
+    width, height = args.size
+    if width * height > 50:
+        parser.error("opening book keys only support boards of up to 50 cells")
+    score_fn = getattr(game_agent, args.score)
+    entries = build_book(args.plies, args.depth, score_fn, width, height)
+    write_book(args.output, width, height, entries)
+    print("Wrote {} positions to {}".format(len(entries), args.output))
+
+
+if __name__ == "__main__":
+    main()
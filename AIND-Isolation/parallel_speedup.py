@@ -0,0 +1,84 @@
+"""Measure how much the root-parallel alpha-beta search gains from extra
+worker processes.
+
+Every worker count searches the same set of positions (random openings
+drawn from a fixed seed) under the same per-move time limit. The script
+reports the mean depth completed within that budget, its gain over the
+first worker count, and the node rate. The node rate is only shown as the
+cost of the search: splitting the root searches more nodes per second
+without necessarily reaching deeper, so it does not measure the speedup.
+
+Usage:
+
+    python parallel_speedup.py --workers 1 2 4 8 16 --positions 20
+"""
+import argparse
+import os
+import time
+
+from benchmark import positions
+from isolation import BitBoard
+from game_agent import ParallelAlphaBetaPlayer, custom_score
+
+
+def measure(workers, openings, time_limit, tt_size):
+    """Search the position after every opening with the given number of
+    workers.
+
+    Returns
+    -------
+    (float, float)
+        The mean depth completed within the time limit and the number of
+        nodes searched per second.
+    """
+    player = ParallelAlphaBetaPlayer(score_fn=custom_score, tt_size=tt_size,
+                                     move_ordering=True, workers=workers)
+    opponent = object()
+    elapsed = 0.
+    try:
+        # start the workers before the first search is timed
+        player.start()
+        for moves in openings:
+            players = (player, opponent) if len(moves) % 2 == 0 else (opponent, player)
+            game = BitBoard(*players)
+            for move in moves:
+                game.apply_move(move)
+            start = time.monotonic()
+            player.get_move(game, lambda: time_limit - 1000 * (time.monotonic() - start))
+            elapsed += time.monotonic() - start
+    finally:
+        player.close()
+    depths = player.completed_depths
+    return sum(depths) / max(1, len(depths)), player.nodes_searched / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure parallel alpha-beta speedup.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                        help="Worker counts to compare.")
+    parser.add_argument("--positions", type=int, default=20,
+                        help="Number of positions searched for each worker count.")
+    parser.add_argument("--plies", type=int, default=8,
+                        help="Number of random moves played to reach each position.")
+    parser.add_argument("--time-limit", type=float, default=150.,
+                        help="Milliseconds allowed for each move.")
+    parser.add_argument("--tt-size", type=int, default=1 << 16,
+                        help="Transposition table slots in each worker.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    openings = positions(args.positions, args.plies, args.seed)
+    depth_label = "Depth@{:g}ms".format(args.time_limit)
+    print("{:>8} {:>12} {:>11} {:>12}".format("Workers", depth_label, "Depth gain", "Nodes/s"))
+    baseline = None
+    for workers in args.workers:
+        depth, rate = measure(workers, openings, args.time_limit, args.tt_size)
+        if baseline is None:
+            baseline = depth
+        print("{:>8} {:>12.2f} {:>+11.2f} {:>12.0f}".format(workers, depth, depth - baseline,
+                                                           rate))
+
+
+if __name__ == "__main__":
+    main()
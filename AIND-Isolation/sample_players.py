@@ -8,6 +8,8 @@ own agent and example heuristic functions.
 
 from random import (randint, choice)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score, custom_score_2, custom_score_3, weights)
+from isolation.bitboard import popcount
+from score_tables import locations, mobility, outcome, score_tables
 import numpy as np
 
 
@@ -61,13 +63,12 @@ def open_move_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    _, _, _, own_mask, opp_mask = mobility(game, player)
+    result = outcome(game, player, own_mask, opp_mask)
+    if result is not None:
+        return result
 
-    return float(len(game.get_legal_moves(player)))
+    return float(popcount(own_mask))
 
 
 def improved_score(game, player):
@@ -91,14 +92,13 @@ def improved_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    _, _, _, own_mask, opp_mask = mobility(game, player)
+    result = outcome(game, player, own_mask, opp_mask)
+    if result is not None:
+        return result
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = popcount(own_mask)
+    opp_moves = popcount(opp_mask)
     return float(own_moves - opp_moves)
 
 
@@ -130,9 +130,8 @@ def center_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    w, h = game.width / 2., game.height / 2.
-    y, x = game.get_player_location(player)
-    return float((h - y)**2 + (w - x)**2)
+    own, _ = locations(game, player)
+    return score_tables(game.width, game.height).center_distance[own]
 
 
 class RandomPlayer():
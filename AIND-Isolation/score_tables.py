@@ -0,0 +1,128 @@
+"""This file contains per-board-size lookup tables for the heuristics in
+`game_agent.py` and `sample_players.py`.
+
+Evaluating a leaf used to build both players' legal move lists (twice more
+for the `is_winner`/`is_loser` checks) and recompute float distances to the
+centre. The tables below are computed once for each board size, so a leaf
+reduces to a few table reads and bitmask operations:
+
+    neighbours      : knight move adjacency, the cell indices one knight
+                      move away from each cell
+    center_distance : squared euclidean distance from each cell to the
+                      centre of the board
+    center_steps    : the number of steps used by `custom_score_2` between
+                      each cell and the centre cell
+    on_wall         : whether `custom_score_3` penalizes a cell as a wall
+    cross_distance  : the distance `custom_score_3` measures between a cell
+                      and the opponent's cell, for every pair of cells
+    move_quality    : the weight `custom_score_3` gives a move to a cell
+                      given the opponent's cell, for every pair of cells
+
+Cells are indexed like the boards (index = row + col * height).
+"""
+from isolation import BitBoard, Board
+from isolation.bitboard import board_tables
+
+# cache of per-size tables keyed by (width, height)
+_TABLES = {}
+
+
+class ScoreTables:
+    """The lookup tables shared by every board of one size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+    """
+
+    def __init__(self, width, height):
+        size = width * height
+        self.size = size
+        self.coords, self.knight_masks, self.full_mask = board_tables(width, height)
+        self.neighbours = tuple(
+            tuple(idx for idx in range(size) if mask >> idx & 1)
+            for mask in self.knight_masks)
+        self.center_distance = tuple(
+            float((height / 2. - r)**2 + (width / 2. - c)**2) for r, c in self.coords)
+        center_r, center_c = -(-height // 2), -(-width // 2)
+        self.center_steps = tuple(
+            abs(c - center_c) + abs(r - center_r) - 1 for r, c in self.coords)
+        # custom_score_3 tests (column, row) against the border cells of a
+        # width x height board listed by (row, column)
+        self.on_wall = tuple(
+            (c in (0, width - 1) and r < width) or (r in (0, height - 1) and c < height)
+            for r, c in self.coords)
+        # pair tables are indexed by cell * size + opponent cell; the
+        # distance deliberately crosses rows and columns like custom_score_3
+        self.cross_distance = tuple(
+            float((oc - r)**2 + (or_ - c)**2)
+            for r, c in self.coords for or_, oc in self.coords)
+        self.move_quality = tuple(1. / d if d else 1. for d in self.cross_distance)
+
+
+def score_tables(width, height):
+    """Return the `ScoreTables` of the given board size. """
+    key = (width, height)
+    if key not in _TABLES:
+        _TABLES[key] = ScoreTables(width, height)
+    return _TABLES[key]
+
+
+def locations(game, player):
+    """Return the cell indices of the player and its opponent, with None
+    for a player that has not moved.
+    """
+    if isinstance(game, BitBoard):
+        p1_loc, p2_loc = game._p1_loc, game._p2_loc
+    else:
+        p1_loc, p2_loc = game._board_state[-1], game._board_state[-2]
+    if player == game._player_1:
+        return p1_loc, p2_loc
+    if player == game._player_2:
+        return p2_loc, p1_loc
+    raise RuntimeError("Invalid player in locations: {}".format(player))
+
+
+def moves_mask(game, idx, tables):
+    """Return the mask of open cells a player at cell `idx` can move to
+    (every open cell if the player has not moved).
+    """
+    if isinstance(game, BitBoard):
+        if idx is Board.NOT_MOVED:
+            return tables.full_mask & ~game._blocked
+        return tables.knight_masks[idx] & ~game._blocked
+    state = game._board_state
+    mask = 0
+    for cell in (range(tables.size) if idx is Board.NOT_MOVED else tables.neighbours[idx]):
+        if state[cell] == Board.BLANK:
+            mask |= 1 << cell
+    return mask
+
+
+def mobility(game, player):
+    """Return the tables, both cell indices and both legal move masks for
+    the player and its opponent.
+
+    Returns
+    -------
+    (ScoreTables, int, int, int, int)
+        The tables, the player's cell, the opponent's cell, the player's
+        move mask and the opponent's move mask.
+    """
+    tables = score_tables(game.width, game.height)
+    own, opp = locations(game, player)
+    return tables, own, opp, moves_mask(game, own, tables), moves_mask(game, opp, tables)
+
+
+def outcome(game, player, own_moves, opp_moves):
+    """Return -inf if the player has lost, +inf if it has won and None
+    otherwise, given both players' move masks (the same results as
+    `game.is_loser` and `game.is_winner`).
+    """
+    if player == game.active_player:
+        return None if own_moves else float("-inf")
+    return None if opp_moves else float("inf")
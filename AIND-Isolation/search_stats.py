@@ -0,0 +1,139 @@
+"""This file contains the search statistics recorded by `IsolationPlayer`
+agents when instrumentation is enabled.
+
+Players only touch a `SearchStats` object at the start and end of each move,
+after each completed iterative deepening iteration, at beta cutoffs and (via
+`CountingScore`) at leaf evaluations, so a player with statistics disabled
+runs exactly the same code as before.
+"""
+import timeit
+
+
+class CountingScore:
+    """Wrap a heuristic so that every call is counted as a leaf evaluation.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The heuristic to wrap.
+
+    stats : `SearchStats`
+        The statistics that receive the count.
+    """
+
+    def __init__(self, score_fn, stats):
+        self.score_fn = score_fn
+        self.stats = stats
+
+    def __call__(self, game, player):
+        self.stats.leaf_evals += 1
+        return self.score_fn(game, player)
+
+
+class SearchStats:
+    """Per-move search statistics of one player.
+
+    Each move searched produces a record (a dict) with the keys:
+
+        nodes       : nodes expanded during the move
+        leaf_evals  : heuristic evaluations during the move
+        depth       : deepest completed iterative deepening iteration
+        ebf         : effective branching factor, the ratio between the node
+                      counts of the last two completed iterations
+        cutoffs     : {move index: number of beta cutoffs caused by the move
+                      searched at that index}
+        depth_times : milliseconds spent on each completed iteration
+        time        : milliseconds spent on the whole move
+
+    Parameters
+    ----------
+    trace : callable (optional)
+        Called with each record as soon as the move is finished.
+
+    Attributes
+    ----------
+    moves : list<dict>
+        The records of every move searched so far.
+
+    leaf_evals : int
+        Running count of heuristic evaluations.
+    """
+
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.moves = []
+        self.leaf_evals = 0
+        self._start = None
+
+    def start_move(self, nodes):
+        """Begin the record of a move; `nodes` is the player's running node
+        count.
+        """
+        now = timeit.default_timer()
+        self._start = (now, nodes, self.leaf_evals)
+        self._last = (now, nodes)
+        self._depth = 0
+        self._iteration_nodes = []
+        self._depth_times = []
+        self._cutoffs = {}
+
+    def end_depth(self, depth, nodes):
+        """Record the completion of an iterative deepening iteration. """
+        now = timeit.default_timer()
+        last_time, last_nodes = self._last
+        self._depth = depth
+        self._iteration_nodes.append(nodes - last_nodes)
+        self._depth_times.append(1000 * (now - last_time))
+        self._last = (now, nodes)
+
+    def cutoff(self, index):
+        """Record a beta cutoff by the move searched at `index`. """
+        self._cutoffs[index] = self._cutoffs.get(index, 0) + 1
+
+    def end_move(self, nodes):
+        """Close the record of the current move and return it. """
+        start_time, start_nodes, start_leaves = self._start
+        counts = self._iteration_nodes
+        record = {
+            "nodes": nodes - start_nodes,
+            "leaf_evals": self.leaf_evals - start_leaves,
+            "depth": self._depth,
+            "ebf": counts[-1] / counts[-2] if len(counts) > 1 and counts[-2] else None,
+            "cutoffs": self._cutoffs,
+            "depth_times": self._depth_times,
+            "time": 1000 * (timeit.default_timer() - start_time),
+        }
+        self.moves.append(record)
+        if self.trace is not None:
+            self.trace(record)
+        return record
+
+    def summary(self):
+        """Aggregate the move records into a flat dict. """
+        moves = self.moves
+        count = len(moves)
+        ebfs = [m["ebf"] for m in moves if m["ebf"] is not None]
+        cutoffs = {}
+        for m in moves:
+            for index, n in m["cutoffs"].items():
+                cutoffs[index] = cutoffs.get(index, 0) + n
+        total_cutoffs = sum(cutoffs.values())
+        depth_times = {}
+        for m in moves:
+            for depth, ms in enumerate(m["depth_times"], 1):
+                depth_times.setdefault(depth, []).append(ms)
+        total_time = sum(m["time"] for m in moves)
+        nodes = sum(m["nodes"] for m in moves)
+        return {
+            "moves": count,
+            "nodes": nodes,
+            "leaf_evals": sum(m["leaf_evals"] for m in moves),
+            "nodes_per_second": 1000 * nodes / total_time if total_time else 0.,
+            "mean_depth": sum(m["depth"] for m in moves) / count if count else 0.,
+            "max_depth": max((m["depth"] for m in moves), default=0),
+            "mean_ebf": sum(ebfs) / len(ebfs) if ebfs else None,
+            "first_move_cutoff_rate": cutoffs.get(0, 0) / total_cutoffs if total_cutoffs else None,
+            "cutoffs": {i: cutoffs[i] for i in sorted(cutoffs)},
+            "mean_depth_time": {d: sum(t) / len(t) for d, t in sorted(depth_times.items())},
+            "mean_move_time": total_time / count if count else 0.,
+        }
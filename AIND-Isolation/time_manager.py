@@ -0,0 +1,115 @@
+"""This file contains a time manager for iterative deepening search.
+
+The search normally deepens until `SearchTimeout` fires, which throws away
+the partial last iteration. The time manager instead predicts the duration
+of the next iteration from the last one and the observed effective
+branching factor (the ratio between the durations of the last two
+iterations), and tells the search not to start iterations that cannot
+finish within the budget of the move.
+"""
+
+
+class TimeManager:
+    """Plan the time an iterative deepening search spends on each move.
+
+    Parameters
+    ----------
+    game_clock : bool (optional)
+        True if `time_left` reports the time remaining for the player's whole
+        game (see the `game_time` option of `Board.play`); each move is then
+        budgeted a share of it. When False, `time_left` is per move and the
+        whole turn is the budget.
+
+    moves_fraction : float (optional)
+        Expected number of moves still to be played by the player, as a
+        fraction of the open cells on the board (game clock only).
+
+    min_moves : int (optional)
+        Lower bound on the expected number of moves still to be played
+        (game clock only).
+
+    hard_factor : float (optional)
+        How far a move may overrun its budget before the search is aborted
+        (game clock only).
+
+    Attributes
+    ----------
+    budget : float
+        Milliseconds the current move is planned to use.
+
+    skipped : int
+        Running count of iterations not started because they were
+        predicted not to finish in time.
+    """
+
+    def __init__(self, game_clock=False, moves_fraction=0.25, min_moves=4,
+                 hard_factor=3.):
+        self.game_clock = game_clock
+        self.moves_fraction = moves_fraction
+        self.min_moves = min_moves
+        self.hard_factor = hard_factor
+        self.budget = 0.
+        self.skipped = 0
+        self._time_left = None
+        self._start = 0.
+        self._open_cells = 0
+        self._iterations = []
+
+    def start_move(self, game, time_left, threshold):
+        """Plan the search of a new move.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position to search.
+
+        time_left : callable
+            The timer passed to `get_move`.
+
+        threshold : float
+            The player's `TIMER_THRESHOLD`.
+
+        Returns
+        -------
+        callable
+            A timer for the search that runs out when either the turn or the
+            hard limit of this move's budget runs out.
+        """
+        self._time_left = time_left
+        self._start = time_left()
+        self._open_cells = len(game.get_blank_spaces())
+        self._iterations = []
+        available = self._start - threshold
+        if self.game_clock:
+            moves_to_go = max(self.min_moves, self._open_cells * self.moves_fraction)
+            self.budget = available / moves_to_go
+            hard_limit = min(available, self.budget * self.hard_factor)
+        else:
+            self.budget = hard_limit = available
+        # the search stops when the returned timer falls below the threshold
+        reserve = available - hard_limit
+        return lambda: time_left() - reserve
+
+    def elapsed(self):
+        """Return the milliseconds spent on the current move. """
+        return self._start - self._time_left()
+
+    def iteration_done(self):
+        """Record the completion of an iteration. """
+        self._iterations.append(self.elapsed() - sum(self._iterations))
+
+    def next_iteration_fits(self, depth):
+        """Return whether an iteration to `depth` is predicted to finish
+        within the budget of the move.
+        """
+        if depth > self._open_cells:
+            # the previous iteration already searched to the end of the game
+            return False
+        times = self._iterations
+        if len(times) < 2:
+            return True
+        ebf = max(1., times[-1] / times[-2]) if times[-2] > 0 else 1.
+        if self.elapsed() + times[-1] * ebf <= self.budget:
+            return True
+        self.skipped += 1
+        return False
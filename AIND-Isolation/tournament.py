@@ -11,20 +11,37 @@ players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
 """
+import csv
 import itertools
+import json
+import math
 import random
+import time
+import timeit
 import warnings
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-from isolation import Board
+from game_records import GameWriter
+from isolation import BitBoard
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
-                        custom_score_2, custom_score_3)
+from game_agent import (IsolationPlayer, MinimaxPlayer, AlphaBetaPlayer,
+                        custom_score, custom_score_2, custom_score_3)
+from time_manager import TimeManager
 
 NUM_MATCHES = 20  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
+GAME_TIME = None  # milliseconds per player for a whole game (None for TIME_LIMIT per move)
+PONDER = False  # let agents that support it think during their opponent's turn
+BOARD_CLASS = BitBoard  # board backend used for every match (Board or BitBoard)
+NUM_WORKERS = 1  # number of processes playing matches in parallel
+SEED = None  # seed for the tournament openings (None for a random seed)
+USE_SPRT = False  # stop pairings early once their result is statistically settled
+STATS_FILE = None  # write per-agent search statistics to this .json or .csv file
+RECORD_FILE = None  # append every game played to this binary game record file
+SEARCH_VARIANTS = False  # also enter AB_Improved with the optional search enhancements
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -36,39 +53,276 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# the outcome of one game of a fair match: whether the test agent won, the
+# termination reason, the seed of the global random state, the board size
+# and every move
+GameResult = namedtuple("GameResult", ["test_won", "termination", "seed", "size", "moves"])
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+
+def match_seed(round_seed, match_idx):
+    """Return the seed used for one fair match of a round. """
+    return "{}-{}".format(round_seed, match_idx)
+
+
+def play_fair_match(cpu_agent, test_agent, seed, timer=None):
+    """Play one "fair" match -- a pair of games from the same random opening
+    with each agent moving first once -- between the cpu agent and a test
+    agent.
+
+    The opening and the global random state used by the agents during each
+    game are derived from `seed`, so a match replays identically in any
+    process for agents whose play does not depend on the clock.
+
+    Moves are timed with `timer`, by default the wall clock, or the CPU time
+    of this process when PONDER is on, so that an agent pondering in
+    another process does not eat into its opponent's time.
+
+    Returns
+    -------
+    list<GameResult>
+        The result of the game with the cpu agent moving first, then of the
+        game with the test agent moving first.
+    """
+    if timer is None:
+        timer = time.process_time if PONDER else timeit.default_timer
+    rng = random.Random(seed)
+    games = [BOARD_CLASS(cpu_agent.player, test_agent.player),
+             BOARD_CLASS(test_agent.player, cpu_agent.player)]
+
+    # initialize both games with a random move and response
+    opening = []
+    for _ in range(2):
+        opening.append(rng.choice(games[0].get_legal_moves()))
+        for game in games:
+            game.apply_move(opening[-1])
+
+    results = []
+    for game in games:
+        game_seed = rng.getrandbits(64)
+        random.seed(game_seed)
+        winner, history, termination = game.play(time_limit=TIME_LIMIT, timer=timer,
+                                                 game_time=GAME_TIME, ponder=PONDER)
+        results.append(GameResult(winner == test_agent.player, termination, game_seed,
+                                  (game.width, game.height),
+                                  opening + [tuple(move) for move in history]))
+    return results
+
+
+def tally(cpu_agent, test_agent, results, win_counts):
+    """Add the results of a fair match to the win counts and return the
+    number of timeouts and forfeits it contained.
+    """
+    timeout_count = 0
+    forfeit_count = 0
+    for result in results:
+        win_counts[test_agent.player if result.test_won else cpu_agent.player] += 1
+
+        if result.termination == "timeout":
+            timeout_count += 1
+        elif result.termination == "forfeit":
+            forfeit_count += 1
+
+    return timeout_count, forfeit_count
+
+
+class SPRT:
+    """Sequential probability ratio test on the win rate of a test agent
+    against a cpu agent.
+
+    The test weighs H0 (the test agent wins with probability p0) against H1
+    (it wins with probability p1) after every fair match, and stops the
+    pairing as soon as either hypothesis is accepted with a false positive
+    rate of at most `alpha` and a false negative rate of at most `beta`.
+
+    Parameters
+    ----------
+    p0, p1 : float
+        Win rates of the test agent under H0 and H1 (p0 < p1).
+
+    alpha, beta : float
+        Error rates for wrongly accepting H1 and wrongly accepting H0.
+
+    Attributes
+    ----------
+    decisions : list<(str, str, str, int)>
+        (cpu agent name, test agent name, accepted hypothesis, games played)
+        for every pairing the test has stopped.
+    """
+
+    def __init__(self, p0=0.45, p1=0.55, alpha=0.05, beta=0.05):
+        self.p0, self.p1 = p0, p1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self._win_llr = math.log(p1 / p0)
+        self._loss_llr = math.log((1 - p1) / (1 - p0))
+        self.decisions = []
+
+    def llr(self, wins, losses):
+        """Return the log-likelihood ratio of H1 over H0. """
+        return wins * self._win_llr + losses * self._loss_llr
+
+    def decide(self, wins, losses):
+        """Return "H1" or "H0" if the results accept that hypothesis, and
+        None if more games are needed.
+        """
+        llr = self.llr(wins, losses)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+def close_agents(agents):
+    """Stop the background processes (e.g., pondering) of the agents' players. """
+    for agent in agents:
+        close = getattr(agent.player, "close", None)
+        if close is not None:
+            close()
+
+
+def record_match(writer, cpu_agent, test_agent, results):
+    """Append the games of a fair match to a `GameWriter`. """
+    seats = [(cpu_agent, test_agent), (test_agent, cpu_agent)]
+    for (player_1, player_2), result in zip(seats, results):
+        test_seat = 0 if player_1 is test_agent else 1
+        winner = test_seat if result.test_won else 1 - test_seat
+        writer.write(*result.size, (player_1.name, player_2.name), winner,
+                     result.termination, result.seed, result.moves)
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, seed=None,
+               sprt=None, game_counts=None, futures=None, writer=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+    Every test agent plays the same openings, selected by `seed`.
+
+    If an `SPRT` is given, a test agent stops playing the cpu agent as soon
+    as the test accepts a hypothesis, so `num_matches` becomes an upper
+    bound; the number of games each test agent actually played is added to
+    `game_counts`. If `futures` maps (test agent index, match index) to the
+    pending results of a parallel tournament, results are collected from
+    them (in the same order as a serial run) instead of playing locally.
+    With a `GameWriter`, every game is appended to its file as soon as its
+    match is tallied.
     """
+    if seed is None:
+        seed = random.getrandbits(32)
     timeout_count = 0
     forfeit_count = 0
-    for _ in range(num_matches):
+    played = {agent.player: 0 for agent in test_agents}
+    pending = list(range(len(test_agents)))
+    for match_idx in range(num_matches):
+        for test_idx in list(pending):
+            agent = test_agents[test_idx]
+            if futures is None:
+                results = play_fair_match(cpu_agent, agent, match_seed(seed, match_idx))
+            else:
+                results, activity = futures[(test_idx, match_idx)].result()
+                for player, (nodes, records) in zip((cpu_agent.player, agent.player), activity):
+                    _fold_activity(player, nodes, records)
+            counts = tally(cpu_agent, agent, results, win_counts)
+            if writer is not None:
+                record_match(writer, cpu_agent, agent, results)
+            timeout_count += counts[0]
+            forfeit_count += counts[1]
+            played[agent.player] += len(results)
+
+            if sprt is None:
+                continue
+            wins = win_counts[agent.player]
+            decision = sprt.decide(wins, played[agent.player] - wins)
+            if decision is not None:
+                sprt.decisions.append((cpu_agent.name, agent.name, decision,
+                                       played[agent.player]))
+                pending.remove(test_idx)
+                if futures is not None:
+                    for idx in range(match_idx + 1, num_matches):
+                        futures[(test_idx, idx)].cancel()
+
+    if game_counts is not None:
+        for player, count in played.items():
+            game_counts[player] = game_counts.get(player, 0) + count
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
+    return timeout_count, forfeit_count
 
-        # initialize all games with a random move and response
-        for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
 
-        # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
+# agents owned by each worker process of a parallel tournament
+_worker_agents = None
 
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
 
-    return timeout_count, forfeit_count
+def _init_worker(cpu_agents, test_agents):
+    global _worker_agents
+    _worker_agents = (cpu_agents, test_agents)
+
+
+def _search_activity(player):
+    """Return the node count and search statistics records of a player. """
+    stats = getattr(player, "stats", None)
+    return getattr(player, "nodes_searched", 0), stats.moves if stats else []
+
+
+def _fold_activity(player, nodes, records):
+    """Add the search activity of a worker's copy of a player to ours. """
+    if nodes:
+        player.nodes_searched += nodes
+    if records:
+        player.stats.moves.extend(records)
+        player.stats.leaf_evals += sum(r["leaf_evals"] for r in records)
+
+
+def _play_fair_match_in_worker(cpu_idx, test_idx, seed):
+    """Play a fair match with the worker's own copies of the agents, timing
+    each move with the worker's CPU clock so that sharing the machine with
+    other workers does not eat into the per-move time limit.
+
+    Returns the match results and, for the cpu and test player, the nodes
+    searched and the search statistics recorded during the match.
+    """
+    cpu_agents, test_agents = _worker_agents
+    players = (cpu_agents[cpu_idx].player, test_agents[test_idx].player)
+    before = [(nodes, len(records)) for nodes, records in map(_search_activity, players)]
+    results = play_fair_match(cpu_agents[cpu_idx], test_agents[test_idx], seed,
+                              timer=time.process_time)
+    close_agents([cpu_agents[cpu_idx], test_agents[test_idx]])
+    activity = []
+    for player, (nodes, count) in zip(players, before):
+        total, records = _search_activity(player)
+        activity.append((total - nodes, records[count:]))
+    return results, activity
+
+
+def write_stats(agents, path):
+    """Write the search statistics summary of every agent that recorded
+    statistics to a JSON file, or to a CSV file with one row per agent.
+    """
+    summaries = {agent.name: agent.player.stats.summary() for agent in agents
+                 if getattr(agent.player, "stats", None) is not None}
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(summaries, f, indent=2)
+        return
+
+    # dict valued entries are flattened into one column per key
+    indices = sorted({i for summary in summaries.values() for i in summary["cutoffs"]})
+    depths = sorted({d for summary in summaries.values() for d in summary["mean_depth_time"]})
+    rows = []
+    for name, summary in summaries.items():
+        row = {"agent": name}
+        row.update((key, value) for key, value in summary.items()
+                   if not isinstance(value, dict))
+        row.update(("cutoffs_{}".format(i), summary["cutoffs"].get(i, 0)) for i in indices)
+        row.update(("depth_{}_ms".format(d), summary["mean_depth_time"].get(d))
+                   for d in depths)
+        rows.append(row)
+    fields = list(rows[0]) if rows else ["agent"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
 
 
 def update(total_wins, wins):
@@ -77,43 +331,137 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None,
+                 sprt=None, stats_file=None, record_file=None):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    With `workers` > 1 the independent fair matches are spread across a
+    process pool. Each worker holds its own copies of the agents and times
+    moves with its own CPU clock. Matches are seeded exactly as in a serial
+    run with the same `seed`, and results are tallied in the same order.
+
+    With an `SPRT`, each pairing stops once the test accepts a hypothesis
+    and `num_matches` is only the maximum number of matches per pairing.
+
+    With a `stats_file`, search statistics are recorded for every
+    `IsolationPlayer` agent and written to the file (see `write_stats`).
+
+    With a `record_file`, every game is appended to that binary game record
+    file while the tournament runs (see `game_records.py`).
+
+    When GAME_TIME is set, every `IsolationPlayer` agent must budget its
+    moves with a `TimeManager(game_clock=True)`; a ValueError is raised
+    otherwise.
+
+    Returns
+    -------
+    dict
+        The number of games won by each test agent's player.
+    """
+    if GAME_TIME is not None:
+        # without a game clock budget an agent spends a whole turn per move
+        untimed = [agent.name for agent in cpu_agents + test_agents
+                   if isinstance(agent.player, IsolationPlayer) and
+                   not getattr(getattr(agent.player, "time_manager", None), "game_clock", False)]
+        if untimed:
+            raise ValueError("GAME_TIME needs agents with a TimeManager(game_clock=True), "
+                             "not {}".format(", ".join(untimed)))
+    if seed is None:
+        seed = random.getrandbits(32)
+    if stats_file is not None:
+        for agent in cpu_agents + test_agents:
+            if isinstance(agent.player, IsolationPlayer) and agent.player.stats is None:
+                agent.player.enable_stats()
     total_wins = {agent.player: 0 for agent in test_agents}
+    total_games = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
-    total_matches = 2 * num_matches * len(cpu_agents)
 
+    print("Seed: {}".format(seed))
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
 
-    for idx, agent in enumerate(cpu_agents):
-        wins = {key: 0 for (key, value) in test_agents}
-        wins[agent.player] = 0
-
-        print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
-
-        counts = play_round(agent, test_agents, wins, num_matches)
-        total_timeouts += counts[0]
-        total_forfeits += counts[1]
-        total_wins = update(total_wins, wins)
-        _total = 2 * num_matches
-        round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
-                            for agent in test_agents], [])
-        print(' ' + ' '.join([
-            '{:^5}| {:^5}'.format(
-                round_totals[i],round_totals[i+1]
-            ) for i in range(0, len(round_totals), 2)
-        ]))
+    writer = None if record_file is None else GameWriter(record_file)
+    executor = None
+    try:
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(cpu_agents, test_agents))
+            # queue every match up front so the pool stays busy across rounds;
+            # matches of pairings stopped by the SPRT are cancelled before they run
+            futures = [{
+                (test_idx, match_idx): executor.submit(
+                    _play_fair_match_in_worker, cpu_idx, test_idx,
+                    match_seed(match_seed(seed, cpu_idx), match_idx))
+                for match_idx in range(num_matches)
+                for test_idx in range(len(test_agents))
+            } for cpu_idx in range(len(cpu_agents))]
+
+        for idx, agent in enumerate(cpu_agents):
+            wins = {key: 0 for (key, value) in test_agents}
+            wins[agent.player] = 0
+            games = {}
+
+            print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
+
+            counts = play_round(agent, test_agents, wins, num_matches,
+                                seed=match_seed(seed, idx), sprt=sprt,
+                                game_counts=games,
+                                futures=None if executor is None else futures[idx],
+                                writer=writer)
+            close_agents([agent] + test_agents)
+            total_timeouts += counts[0]
+            total_forfeits += counts[1]
+            total_wins = update(total_wins, wins)
+            total_games = update(total_games, games)
+            round_totals = sum([[wins[agent.player], games[agent.player] - wins[agent.player]]
+                                for agent in test_agents], [])
+            print(' ' + ' '.join([
+                '{:^5}| {:^5}'.format(
+                    round_totals[i],round_totals[i+1]
+                ) for i in range(0, len(round_totals), 2)
+            ]))
+    finally:
+        # also reached when a round raises or is interrupted, so that no
+        # worker process outlives the tournament
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        print("\n{} games appended to {}".format(writer.games, record_file))
 
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
         ''.join([
             '{:^13}'.format(
-                "{:.1f}%".format(100 * total_wins[x[1].player] / total_matches)
+                "{:.1f}%".format(100 * total_wins[x[1].player] / total_games[x[1].player])
             ) for x in enumerate(test_agents)
     ]))
 
+    node_counts = [getattr(agent.player, "nodes_searched", None)
+                   for agent in test_agents]
+    if any(count is not None for count in node_counts):
+        print('{:^9}{:^13}'.format("", "Nodes:") + ''.join([
+            '{:^13}'.format("-" if count is None else count)
+            for count in node_counts
+        ]))
+
+    if stats_file is not None:
+        write_stats(cpu_agents + test_agents, stats_file)
+        print("\nSearch statistics written to {}".format(stats_file))
+
+    if sprt is not None:
+        print("\nSPRT (p0={}, p1={}) decisions:".format(sprt.p0, sprt.p1))
+        for cpu_name, test_name, decision, played in sprt.decisions:
+            print("    {} vs {}: {} accepted after {} games".format(
+                test_name, cpu_name, decision, played))
+        max_games = 2 * num_matches * len(cpu_agents) * len(test_agents)
+        played_games = sum(total_games.values())
+        print("SPRT stopped early in {} of {} pairings, saving {} of {} games.".format(
+            len(sprt.decisions), len(cpu_agents) * len(test_agents),
+            max_games - played_games, max_games))
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
@@ -123,21 +471,31 @@ def play_matches(cpu_agents, test_agents, num_matches):
         print(("\nYour ID search forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
 
+    return total_wins
+
 
 def main():
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
     test_agents = [
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
+        Agent(AlphaBetaPlayer(score_fn=improved_score, ponder=PONDER), "AB_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3, ponder=PONDER), "AB_Custom_3")
     ]
 
         # Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
         # Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
+    if SEARCH_VARIANTS:
+        test_agents.append(
+            Agent(AlphaBetaPlayer(score_fn=improved_score, move_ordering=True,
+                                  ponder=PONDER), "AB_Ordered"))
+        test_agents.append(
+            Agent(AlphaBetaPlayer(score_fn=improved_score, move_ordering=True, pvs=True,
+                                  aspiration=1., ponder=PONDER), "AB_PVS"))
+
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
-        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
+        Agent(AlphaBetaPlayer(score_fn=improved_score, ponder=PONDER), "AB_Improved")
     ]
 
         # Agent(RandomPlayer(), "Random"),
@@ -145,13 +503,19 @@ def main():
         # Agent(MinimaxPlayer(score_fn=center_score), "MM_Center"),
         # Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
         # Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
-        # Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),    
+        # Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
+
+    if GAME_TIME is not None:
+        for agent in cpu_agents + test_agents:
+            agent.player.time_manager = TimeManager(game_clock=True)
 
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    play_matches(cpu_agents, test_agents, NUM_MATCHES, workers=NUM_WORKERS,
+                 seed=SEED, sprt=SPRT() if USE_SPRT else None,
+                 stats_file=STATS_FILE, record_file=RECORD_FILE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+"""This file contains a bounded transposition table for the isolation search
+agents.  Entries are keyed by the Zobrist hash returned by `Board.hash()`.
+"""
+
+# bound types recorded with each stored value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    """Fixed-size cache of search results.
+
+    Every slot has two buckets: a depth-preferred bucket that keeps the entry
+    searched to the greatest depth, and an always-replace bucket that takes
+    any entry the depth-preferred bucket rejects. Memory use is bounded by
+    `2 * size` entries no matter how long the table is used.
+
+    Parameters
+    ----------
+    size : int
+        The number of slots in the table.
+
+    Attributes
+    ----------
+    hits : int
+        Number of probes that found an entry for the requested key.
+
+    misses : int
+        Number of probes that found no entry for the requested key.
+
+    collisions : int
+        Number of misses where the slot was occupied by a different key.
+
+    stores : int
+        Number of entries written to the table.
+    """
+
+    def __init__(self, size=2 ** 16):
+        if size <= 0:
+            raise ValueError("Transposition table size must be positive.")
+        self.size = size
+        self._depth_preferred = [None] * size
+        self._always_replace = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """Look up the entry stored for a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        Returns
+        -------
+        (int, int, float, int, (int, int)) or None
+            The stored (key, depth, value, bound, best move) tuple, or None
+            if the position is not in the table.
+        """
+        idx = key % self.size
+        entry = self._depth_preferred[idx]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self._always_replace[idx]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        """Record the result of searching a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        depth : int
+            The remaining search depth the value was computed with.
+
+        value : float
+            The value of the position from the searching player's view.
+
+        bound : int
+            EXACT, LOWER or UPPER depending on whether the value is exact or
+            only a bound produced by an alpha-beta cutoff.
+
+        move : (int, int)
+            The best move found for the position.
+        """
+        idx = key % self.size
+        entry = (key, depth, value, bound, move)
+        current = self._depth_preferred[idx]
+        if current is None or current[0] == key or depth >= current[1]:
+            self._depth_preferred[idx] = entry
+        else:
+            self._always_replace[idx] = entry
+        self.stores += 1
+
+    def clear(self):
+        """Remove every entry and reset the counters. """
+        self.__init__(self.size)
+
+    def stats(self):
+        """Return the table counters and occupancy as a dict. """
+        used = (sum(1 for e in self._depth_preferred if e is not None) +
+                sum(1 for e in self._always_replace if e is not None))
+        probes = self.hits + self.misses
+        return {
+            "size": self.size,
+            "entries": used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.,
+        }
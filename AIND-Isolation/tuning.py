@@ -0,0 +1,237 @@
+"""Tune the weights and the phase threshold of `custom_score_3` by self-play.
+
+The tuner runs simultaneous perturbation stochastic approximation (SPSA), a
+derivative-free optimizer that only needs the result of a match between two
+candidates. Every iteration perturbs all the parameters at once by a random
+sign vector, plays the candidate shifted one way against the candidate
+shifted the other way, and moves the parameters in the direction of the
+winner:
+
+    theta += lr_k * c_k * delta * (points(theta + c_k * delta) -
+                                   points(theta - c_k * delta)) / games
+
+where delta is a vector of random +1/-1, c_k the perturbation size of each
+parameter and lr_k the learning rate, both decaying with the iteration k.
+
+Every iteration plays the same fixed suite of openings (random moves drawn
+from a fixed seed), each once with either candidate moving first, so the
+candidates always meet on the same positions. The players search every
+move to a fixed depth, so results do not depend on the speed of the
+machine, and the games of an iteration are spread across a process pool.
+After each iteration the parameters and the history of the run are saved
+to a JSON checkpoint, from which an interrupted run resumes.
+
+Usage:
+
+    python tuning.py --iterations 200 --workers 8 --checkpoint tuning.json
+"""
+import argparse
+import json
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from benchmark import positions
+from game_agent import (AlphaBetaPlayer, SearchTimeout, SCORE_3_WEIGHTS, Score3Weights,
+                        custom_score_3)
+from isolation import BitBoard
+
+# perturbation size at the first iteration and (low, high) bounds of each
+# parameter, in the order of `Score3Weights`
+SCALES = Score3Weights(0.5, 0.5, 0.5, 0.5, 0.5, 10., 0.5, 0.5)
+BOUNDS = Score3Weights((0., 5.), (0., 5.), (0., 5.), (0., 5.), (0., 5.),
+                       (0., 100.), (0., 5.), (0., 5.))
+
+
+class FixedDepthPlayer(AlphaBetaPlayer):
+    """Alpha-beta player that searches every move to `search_depth` instead
+    of deepening until its time runs out.
+    """
+
+    def get_move(self, game, time_left):
+        self.time_left = time_left
+        try:
+            return self.alphabeta(game, self.search_depth)
+        except SearchTimeout:
+            legal_moves = game.get_legal_moves()
+            return legal_moves[0] if legal_moves else (-1, -1)
+
+
+def make_player(theta, depth):
+    """Return a player searching to `depth` with `custom_score_3` weighted
+    by the parameter vector `theta`.
+    """
+    score_fn = partial(custom_score_3, weights=Score3Weights(*theta))
+    return FixedDepthPlayer(search_depth=depth, score_fn=score_fn, move_ordering=True)
+
+
+def play_match(theta_a, theta_b, opening, seed, depth):
+    """Play the opening twice, once with each candidate moving first, and
+    return the number of games won by candidate a.
+    """
+    points = 0
+    for first in range(2):
+        players = [make_player(theta_a, depth), make_player(theta_b, depth)]
+        game = BitBoard(*(players if first == 0 else players[::-1]))
+        for move in opening:
+            game.apply_move(move)
+        random.seed("{}-{}".format(seed, first))
+        winner, _, _ = game.play(time_limit=float("inf"))
+        points += winner is players[0]
+    return points
+
+
+def play_suite(executor, theta_a, theta_b, openings, depth, seed):
+    """Play every opening of the suite between two candidates and return
+    the fraction of the games won by candidate a.
+    """
+    futures = [executor.submit(play_match, theta_a, theta_b, opening,
+                               "{}-{}".format(seed, idx), depth)
+               for idx, opening in enumerate(openings)]
+    return sum(future.result() for future in futures) / (2. * len(openings))
+
+
+class SPSA:
+    """SPSA on the win rate of a candidate against its mirror image.
+
+    Parameters
+    ----------
+    theta : list<float>
+        The initial parameters.
+
+    scales : list<float>
+        The perturbation size of each parameter at the first iteration.
+
+    bounds : list<(float, float)>
+        The range each parameter is clipped to.
+
+    learning_rate : float (optional)
+        The learning rate at the first iteration, in units of the
+        perturbation size.
+
+    stability : float (optional)
+        Offset of the iteration count that slows the early decay of the
+        learning rate.
+
+    alpha, gamma : float (optional)
+        Decay exponents of the learning rate and of the perturbation size.
+    """
+
+    def __init__(self, theta, scales, bounds, learning_rate=2., stability=10.,
+                 alpha=0.602, gamma=0.101):
+        self.theta = list(theta)
+        self.scales = scales
+        self.bounds = bounds
+        self.learning_rate = learning_rate
+        self.stability = stability
+        self.alpha = alpha
+        self.gamma = gamma
+
+    def perturbations(self, k, seed):
+        """Return the perturbed candidates (plus, minus) and the sign vector
+        of iteration `k`; the signs only depend on `seed` and `k`, so a
+        resumed run repeats them exactly.
+        """
+        rng = random.Random("{}-{}".format(seed, k))
+        delta = [rng.choice((-1, 1)) for _ in self.theta]
+        size = (k + 1) ** self.gamma
+        plus = [self.clip(i, t + d * c / size)
+                for i, (t, d, c) in enumerate(zip(self.theta, delta, self.scales))]
+        minus = [self.clip(i, t - d * c / size)
+                 for i, (t, d, c) in enumerate(zip(self.theta, delta, self.scales))]
+        return plus, minus, delta
+
+    def update(self, k, delta, result):
+        """Move the parameters given the win rate `result` of the plus
+        candidate against the minus candidate in iteration `k`.
+        """
+        rate = self.learning_rate / (self.stability + k + 1) ** self.alpha
+        size = (k + 1) ** self.gamma
+        # a win rate of 0.5 leaves the parameters where they are
+        gradient = 2 * result - 1
+        self.theta = [self.clip(i, t + rate * (c / size) * d * gradient)
+                      for i, (t, d, c) in enumerate(zip(self.theta, delta, self.scales))]
+
+    def clip(self, idx, value):
+        low, high = self.bounds[idx]
+        return min(high, max(low, value))
+
+
+def load_checkpoint(path, settings):
+    """Return the saved state of a run with the same settings, or None if
+    there is no checkpoint.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if state["settings"] != settings:
+        raise ValueError("{} was written by a run with different settings: {}".format(
+            path, state["settings"]))
+    return state
+
+
+def save_checkpoint(path, state):
+    """Write the state of the run, replacing the checkpoint atomically. """
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune custom_score_3 by self-play with SPSA.")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="Total number of SPSA iterations.")
+    parser.add_argument("--openings", type=int, default=16,
+                        help="Number of openings in the suite; each is played twice per iteration.")
+    parser.add_argument("--plies", type=int, default=4,
+                        help="Number of random moves played to reach each opening.")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="Fixed alpha-beta search depth of every move.")
+    parser.add_argument("--learning-rate", type=float, default=2.)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the opening suite and of the perturbations.")
+    parser.add_argument("--checkpoint", help="JSON file to save progress to and resume from.")
+    args = parser.parse_args()
+
+    settings = {"openings": args.openings, "plies": args.plies, "depth": args.depth,
+                "learning_rate": args.learning_rate, "seed": args.seed}
+    try:
+        state = load_checkpoint(args.checkpoint, settings)
+    except ValueError as e:
+        parser.error(str(e))
+    if state is None:
+        state = {"settings": settings, "iteration": 0, "theta": list(SCORE_3_WEIGHTS),
+                 "history": []}
+    else:
+        print("Resuming from iteration {}".format(state["iteration"]))
+
+    openings = positions(args.openings, args.plies, args.seed)
+    spsa = SPSA(state["theta"], SCALES, BOUNDS, learning_rate=args.learning_rate)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for k in range(state["iteration"], args.iterations):
+            plus, minus, delta = spsa.perturbations(k, args.seed)
+            result = play_suite(executor, plus, minus, openings, args.depth,
+                                "{}-{}".format(args.seed, k))
+            spsa.update(k, delta, result)
+            state["iteration"] = k + 1
+            state["theta"] = spsa.theta
+            state["history"].append({"iteration": k, "result": result, "theta": spsa.theta})
+            if args.checkpoint is not None:
+                save_checkpoint(args.checkpoint, state)
+            print("{:>5} {:>6.3f}  {}".format(
+                k, result, " ".join("{:.3f}".format(t) for t in spsa.theta)))
+
+        tuned = Score3Weights(*spsa.theta)
+        print("\nTuned weights: {}".format(tuned))
+        win_rate = play_suite(executor, list(tuned), list(SCORE_3_WEIGHTS), openings,
+                              args.depth, "{}-final".format(args.seed))
+        print("Win rate against the default weights: {:.1f}%".format(100 * win_rate))
+
+
+if __name__ == "__main__":
+    main()
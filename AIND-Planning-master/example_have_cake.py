@@ -1,12 +1,12 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, breadth_first_search, astar_search, depth_first_graph_search,
     uniform_cost_search, greedy_best_first_graph_search, Problem,
 )
 from aimacode.utils import expr
+from lp_grounding import ActionSchema, ground_actions
 from lp_utils import (
-    FluentState, encode_state, decode_state
+    FluentState, encode_state, decode_state, true_fluents
 )
 from my_planning_graph import PlanningGraph
 from run_search import run_search
@@ -21,33 +21,29 @@ class HaveCakeProblem(Problem):
         self.actions_list = self.get_actions()
 
     def get_actions(self):
-        precond_pos = [expr("Have(Cake)")]
-        precond_neg = []
-        effect_add = [expr("Eaten(Cake)")]
-        effect_rem = [expr("Have(Cake)")]
-        eat_action = Action(expr("Eat(Cake)"),
-                            [precond_pos, precond_neg],
-                            [effect_add, effect_rem])
-        precond_pos = []
-        precond_neg = [expr("Have(Cake)")]
-        effect_add = [expr("Have(Cake)")]
-        effect_rem = []
-        bake_action = Action(expr("Bake(Cake)"),
-                             [precond_pos, precond_neg],
-                             [effect_add, effect_rem])
-        return [eat_action, bake_action]
+        eat = ActionSchema(
+            Action(expr("Eat(x)"),
+                   [[expr("Have(x)")], []],
+                   [[expr("Eaten(x)")], [expr("Have(x)")]]),
+            ("Food",))
+        bake = ActionSchema(
+            Action(expr("Bake(x)"),
+                   [[], [expr("Have(x)")]],
+                   [[expr("Have(x)")], []]),
+            ("Food",))
+        initial = decode_state(self.initial, self.state_map).pos
+        return ground_actions([eat, bake], {"Food": ["Cake"]}, initial)
 
     def actions(self, state: str) -> list:  # of Action
         possible_actions = []
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
+        fluents = true_fluents(state, self.state_map)
         for action in self.actions_list:
             is_possible = True
             for clause in action.precond_pos:
-                if clause not in kb.clauses:
+                if clause not in fluents:
                     is_possible = False
             for clause in action.precond_neg:
-                if clause in kb.clauses:
+                if clause in fluents:
                     is_possible = False
             if is_possible:
                 possible_actions.append(action)
@@ -71,10 +67,9 @@ class HaveCakeProblem(Problem):
         return encode_state(new_state, self.state_map)
 
     def goal_test(self, state: str) -> bool:
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
+        fluents = true_fluents(state, self.state_map)
         for clause in self.goal:
-            if clause not in kb.clauses:
+            if clause not in fluents:
                 return False
         return True
 
@@ -0,0 +1,142 @@
+"""Ground typed action schemas into the concrete actions of a planning problem.
+
+A schema is an `aimacode.planning.Action` whose arguments are variables,
+together with the type of each argument:
+
+    load = ActionSchema(
+        Action(expr("Load(c, p, a)"),
+               [[expr("At(c, a)"), expr("At(p, a)")], []],
+               [[expr("In(c, p)")], [expr("At(c, a)")]]),
+        ("Cargo", "Plane", "Airport"))
+
+Rather than instantiating every combination of typed objects, grounding
+runs the delete relaxation of the problem to a fixpoint: starting from the
+fluents true in the initial state, it instantiates the schemas whose
+positive preconditions match reachable fluents, adds their effects to the
+reachable set, and repeats until nothing new is reached. Actions that can
+never fire from the initial state are left out.
+"""
+from itertools import product
+
+from aimacode.planning import Action
+from aimacode.utils import Expr, expr
+
+
+class ActionSchema():
+    """ an action schema with typed parameters
+
+    """
+
+    def __init__(self, action: Action, types: tuple, distinct=False):
+        """
+        :param action: Action whose args are the schema variables
+        :param types: tuple of str, the type of each variable in action.args
+        :param distinct: bool, whether the variables must bind to pairwise
+            distinct objects (e.g. the two airports of Fly), or a list of
+            (variable, variable) pairs that must bind to different objects
+        """
+        self.action = action
+        self.types = types
+        self.distinct = distinct
+
+
+def ground_actions(schemas: list, objects: dict, initial: list) -> list:
+    """ ground the actions of the schemas reachable from an initial state
+
+    :param schemas: list of ActionSchema
+    :param objects: dict of type name to list of object names (str or Expr)
+    :param initial: list of the fluents true in the initial state
+    :return: list of Action, ordered by schema and then by the order of each
+        argument in its objects list
+    """
+    typed = {kind: [expr(name) if isinstance(name, str) else name for name in names]
+             for kind, names in objects.items()}
+    reachable = set(initial)
+    grounded = {}
+    changed = True
+    while changed:
+        changed = False
+        facts = _facts_by_op(reachable)
+        for pos, schema in enumerate(schemas):
+            for args in _bindings(schema, typed, facts):
+                if (pos, args) in grounded:
+                    continue
+                action = instantiate(schema.action, args)
+                grounded[(pos, args)] = action
+                for fluent in action.effect_add:
+                    if fluent not in reachable:
+                        reachable.add(fluent)
+                        changed = True
+
+    rank = {kind: {name: idx for idx, name in enumerate(names)} for kind, names in typed.items()}
+
+    def order(key):
+        pos, args = key
+        return pos, tuple(rank[kind][arg] for kind, arg in zip(schemas[pos].types, args))
+
+    return [grounded[key] for key in sorted(grounded, key=order)]
+
+
+def instantiate(schema: Action, args: tuple) -> Action:
+    """ the concrete action binding the variables of a schema to objects
+
+    :param schema: Action whose args are variables
+    :param args: tuple of Expr objects, one per schema variable
+    :return: Action
+    """
+    def bind(literals):
+        return [schema.substitute(literal, args) for literal in literals]
+
+    return Action(Expr(schema.name, *args),
+                  [bind(schema.precond_pos), bind(schema.precond_neg)],
+                  [bind(schema.effect_add), bind(schema.effect_rem)])
+
+
+def _facts_by_op(fluents):
+    facts = {}
+    for fluent in fluents:
+        facts.setdefault((fluent.op, len(fluent.args)), []).append(fluent)
+    return facts
+
+
+def _bindings(schema: ActionSchema, typed: dict, facts: dict):
+    """ yield the argument tuples for which every positive precondition of
+    the schema is among the facts """
+    params = schema.action.args
+    domains = [frozenset(typed.get(kind, ())) for kind in schema.types]
+    if schema.distinct is True:
+        pairs = [(i, j) for i in range(len(params)) for j in range(i + 1, len(params))]
+    else:
+        pairs = [(params.index(a), params.index(b)) for a, b in schema.distinct or ()]
+
+    def match(pattern, fact, binding):
+        binding = dict(binding)
+        for arg, value in zip(pattern.args, fact.args):
+            if arg in params:
+                idx = params.index(arg)
+                if binding.get(idx, value) != value or value not in domains[idx]:
+                    return None
+                binding[idx] = value
+            elif arg != value:
+                return None
+        return binding
+
+    def extend(binding, preconds):
+        if preconds:
+            pattern = preconds[0]
+            for fact in facts.get((pattern.op, len(pattern.args)), ()):
+                extended = match(pattern, fact, binding)
+                if extended is not None:
+                    yield from extend(extended, preconds[1:])
+            return
+        # parameters that no positive precondition mentions range over their type
+        free = [idx for idx in range(len(params)) if idx not in binding]
+        for values in product(*(typed.get(schema.types[idx], ()) for idx in free)):
+            full = dict(binding)
+            full.update(zip(free, values))
+            args = tuple(full[idx] for idx in range(len(params)))
+            if any(args[i] == args[j] for i, j in pairs):
+                continue
+            yield args
+
+    yield from extend({}, list(schema.action.precond_pos))
@@ -0,0 +1,272 @@
+"""Read STRIPS problems written in PDDL and generate random Air Cargo instances.
+
+Only the subset of PDDL used by the Air Cargo domain is understood: typed
+objects and parameters, preconditions that are a conjunction of literals and
+negated literals (including `(not (= ?x ?y))`), conjunctive add/delete
+effects and conjunctive positive goals. Names are converted to the style of
+the hand-written problems: predicates and actions are capitalized (`at` ->
+`At`), objects are upper case (`sfo` -> `SFO`), types are capitalized
+(`cargo` -> `Cargo`) and variables lose their `?`.
+
+    p = load_air_cargo_files(AIR_CARGO_DOMAIN, "pddl/air_cargo_p1.pddl")
+    p = generate_air_cargo(cargos=6, planes=3, airports=4, seed=0)
+"""
+import os
+import random
+import re
+
+from aimacode.planning import Action
+from aimacode.utils import Expr
+from lp_grounding import ActionSchema, ground_actions
+from lp_utils import FluentState
+from my_air_cargo_problems import AirCargoProblem
+
+AIR_CARGO_DOMAIN = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                "pddl", "air_cargo_domain.pddl")
+
+
+class PddlDomain():
+    """ the action schemas of a PDDL domain
+
+    """
+
+    def __init__(self, name: str, schemas: list):
+        self.name = name
+        self.schemas = schemas
+
+
+class PddlProblem():
+    """ the objects, initial state and goal of a PDDL problem
+
+    """
+
+    def __init__(self, name: str, objects: dict, init: list, goal: list):
+        self.name = name
+        self.objects = objects
+        self.init = init
+        self.goal = goal
+
+
+def parse(text: str) -> list:
+    """ parse PDDL text into nested lists of lower case tokens
+
+    :param text: str
+    :return: list, the first s-expression of the text
+    """
+    text = re.sub(r';[^\n]*', '', text).lower()
+    stack = [[]]
+    for token in re.findall(r'[()]|[^\s()]+', text):
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            if len(stack) == 1:
+                raise ValueError("unbalanced ')' in PDDL text")
+            done = stack.pop()
+            stack[-1].append(done)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1 or not stack[0]:
+        raise ValueError("unbalanced or empty PDDL text")
+    return stack[0][0]
+
+
+def read_domain(text: str) -> PddlDomain:
+    """ read the action schemas of a PDDL domain
+
+    :param text: str PDDL domain definition
+    :return: PddlDomain
+    """
+    tree = parse(text)
+    name = _header(tree, 'domain')
+    schemas = [_schema(section) for section in tree[2:] if section[0] == ':action']
+    return PddlDomain(name, schemas)
+
+
+def read_problem(text: str) -> PddlProblem:
+    """ read the objects, initial state and goal of a PDDL problem
+
+    :param text: str PDDL problem definition
+    :return: PddlProblem
+    """
+    tree = parse(text)
+    name = _header(tree, 'problem')
+    objects, init, goal = {}, [], []
+    for section in tree[2:]:
+        if section[0] == ':objects':
+            for obj, kind in _typed_list(section[1:]):
+                objects.setdefault(_type_name(kind), []).append(_object_name(obj))
+        elif section[0] == ':init':
+            init = [_literal(fact, ()) for fact in section[1:]]
+        elif section[0] == ':goal':
+            pos, neg, _ = _conjunction(section[1], ())
+            if neg:
+                raise ValueError("negative goals are not supported: {}".format(neg))
+            goal = pos
+    return PddlProblem(name, objects, init, goal)
+
+
+def load_air_cargo(domain_text: str, problem_text: str) -> AirCargoProblem:
+    """ build an AirCargoProblem from PDDL domain and problem definitions
+
+    The state map holds the initial fluents, the goal fluents and every
+    fluent mentioned by a reachable ground action.
+
+    :param domain_text: str PDDL domain over the types cargo, plane and airport
+    :param problem_text: str PDDL problem of the domain
+    :return: AirCargoProblem
+    """
+    domain = read_domain(domain_text)
+    problem = read_problem(problem_text)
+    unknown = set(problem.objects) - {'Cargo', 'Plane', 'Airport'}
+    if unknown:
+        raise ValueError("Air Cargo problems only have cargo, plane and airport "
+                         "objects, not {}".format(sorted(unknown)))
+    fluents = set(problem.init) | set(problem.goal)
+    for action in ground_actions(domain.schemas, problem.objects, problem.init):
+        fluents.update(action.precond_pos + action.precond_neg +
+                       action.effect_add + action.effect_rem)
+    initial = FluentState(list(problem.init),
+                          sorted(fluents - set(problem.init), key=str))
+    return AirCargoProblem(problem.objects.get('Cargo', []), problem.objects.get('Plane', []),
+                           problem.objects.get('Airport', []), initial, problem.goal,
+                           schemas=domain.schemas)
+
+
+def load_air_cargo_files(domain_path: str, problem_path: str) -> AirCargoProblem:
+    """ build an AirCargoProblem from PDDL domain and problem files
+
+    :param domain_path: str
+    :param problem_path: str
+    :return: AirCargoProblem
+    """
+    with open(domain_path) as domain, open(problem_path) as problem:
+        return load_air_cargo(domain.read(), problem.read())
+
+
+def random_air_cargo(cargos: int, planes: int, airports: int, seed=0) -> str:
+    """ PDDL text of a random Air Cargo problem
+
+    Every cargo and plane starts at a random airport, and every cargo must
+    be moved to a random airport other than its own (when there are two or
+    more airports).
+
+    :param cargos: int number of cargos c1, c2, ...
+    :param planes: int number of planes p1, p2, ...
+    :param airports: int number of airports a1, a2, ...
+    :param seed: int seed of the instance
+    :return: str PDDL problem of the Air Cargo domain
+    """
+    rng = random.Random(seed)
+    cargo_names = ["c{}".format(i + 1) for i in range(cargos)]
+    plane_names = ["p{}".format(i + 1) for i in range(planes)]
+    airport_names = ["a{}".format(i + 1) for i in range(airports)]
+    init, goal = [], []
+    for cargo in cargo_names:
+        start = rng.choice(airport_names)
+        init.append("(at {} {})".format(cargo, start))
+        others = [airport for airport in airport_names if airport != start]
+        goal.append("(at {} {})".format(cargo, rng.choice(others or airport_names)))
+    for plane in plane_names:
+        init.append("(at {} {})".format(plane, rng.choice(airport_names)))
+    return "\n".join([
+        "(define (problem air-cargo-{}-{}-{}-{})".format(cargos, planes, airports, seed),
+        "  (:domain air-cargo)",
+        "  (:objects {} - cargo".format(" ".join(cargo_names)),
+        "            {} - plane".format(" ".join(plane_names)),
+        "            {} - airport)".format(" ".join(airport_names)),
+        "  (:init {})".format(" ".join(init)),
+        "  (:goal (and {})))".format(" ".join(goal)),
+        ""])
+
+
+def generate_air_cargo(cargos: int, planes: int, airports: int, seed=0) -> AirCargoProblem:
+    """ a random Air Cargo problem, see random_air_cargo
+
+    :return: AirCargoProblem
+    """
+    with open(AIR_CARGO_DOMAIN) as domain:
+        return load_air_cargo(domain.read(), random_air_cargo(cargos, planes, airports, seed))
+
+
+def _header(tree, kind):
+    if not tree or tree[0] != 'define' or len(tree) < 2 or tree[1][0] != kind:
+        raise ValueError("expected (define ({} <name>) ...)".format(kind))
+    return tree[1][1]
+
+
+def _typed_list(items):
+    """ pair each name of a PDDL typed list with its type """
+    typed, names = [], []
+    items = list(items)
+    while items:
+        item = items.pop(0)
+        if item == '-':
+            kind = items.pop(0)
+            typed.extend((name, kind) for name in names)
+            names = []
+        else:
+            names.append(item)
+    typed.extend((name, 'object') for name in names)
+    return typed
+
+
+def _type_name(name):
+    return name.capitalize()
+
+
+def _object_name(name):
+    return name.upper().replace('-', '_')
+
+
+def _symbol_name(name):
+    return "".join(part.capitalize() for part in name.split('-'))
+
+
+def _variable_name(name):
+    return name[1:].replace('-', '_')
+
+
+def _term(token, variables):
+    if token.startswith('?'):
+        if token not in variables:
+            raise ValueError("unknown variable {}".format(token))
+        return Expr(_variable_name(token))
+    return Expr(_object_name(token))
+
+
+def _literal(sexp, variables):
+    if not isinstance(sexp, list) or not sexp or isinstance(sexp[0], list):
+        raise ValueError("expected a literal, got {}".format(sexp))
+    return Expr(_symbol_name(sexp[0]), *(_term(token, variables) for token in sexp[1:]))
+
+
+def _conjunction(sexp, variables):
+    """ split a conjunction into positive literals, negative literals and
+    pairs of terms that must differ """
+    pos, neg, distinct = [], [], []
+    parts = sexp[1:] if sexp and sexp[0] == 'and' else [sexp]
+    for part in parts:
+        if part and part[0] == 'not':
+            inner = part[1]
+            if inner and inner[0] == '=':
+                distinct.append((_term(inner[1], variables), _term(inner[2], variables)))
+            else:
+                neg.append(_literal(inner, variables))
+        elif part and part[0] in ('or', 'forall', 'exists', 'when', 'imply', '='):
+            raise ValueError("unsupported PDDL construct: {}".format(part[0]))
+        else:
+            pos.append(_literal(part, variables))
+    return pos, neg, distinct
+
+
+def _schema(section):
+    name = section[1]
+    fields = dict(zip(section[2::2], section[3::2]))
+    parameters = _typed_list(fields.get(':parameters', []))
+    variables = [var for var, _ in parameters]
+    precond_pos, precond_neg, distinct = _conjunction(fields.get(':precondition', ['and']),
+                                                      variables)
+    effect_add, effect_rem, _ = _conjunction(fields.get(':effect', ['and']), variables)
+    action = Action(Expr(_symbol_name(name), *(Expr(_variable_name(var)) for var in variables)),
+                    [precond_pos, precond_neg], [effect_add, effect_rem])
+    return ActionSchema(action, tuple(_type_name(kind) for _, kind in parameters), distinct)
@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 from aimacode.logic import associate
 from aimacode.utils import expr
 
@@ -50,19 +52,152 @@ def encode_state(fs: FluentState, fluent_map: list) -> str:
     return "".join(state_tf)
 
 
-def decode_state(state: str, fluent_map: list) -> FluentState:
-    """ decode string of T/F as fluent per mapping
+def decode_state(state, fluent_map: list) -> FluentState:
+    """ decode string of T/F (or integer bitset) as fluent per mapping
 
-    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents,
+        or int bitset as returned by encode_state_bits
     :param fluent_map: ordered list of possible fluents for the problem
     :return: fs: FluentState object
 
     lengths of state string and fluent_map list must be the same
+    (bits above len(fluent_map) are ignored for int states)
     """
     fs = FluentState([], [])
+    if isinstance(state, int):
+        for idx, fluent in enumerate(fluent_map):
+            if state >> idx & 1:
+                fs.pos.append(fluent)
+            else:
+                fs.neg.append(fluent)
+        return fs
     for idx, char in enumerate(state):
         if char == 'T':
             fs.pos.append(fluent_map[idx])
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+def true_fluents(state, fluent_map: list) -> frozenset:
+    """ the set of fluents that hold in an encoded state
+
+    Membership tests against the result are O(1), unlike building a PropKB
+    from the state's sentence and searching its clauses.
+
+    :param state: str of T/F or int bitset, see decode_state
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: frozenset of fluent exprs
+    """
+    return frozenset(decode_state(state, fluent_map).pos)
+
+
+ActionMasks = namedtuple('ActionMasks', ['pre_pos', 'pre_neg', 'add', 'rem'])
+
+
+def fluent_index(fluent_map: list) -> dict:
+    """ map each fluent to its bit position in an integer bitset state
+
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: dict of fluent expr to int
+    """
+    return {fluent: idx for idx, fluent in enumerate(fluent_map)}
+
+
+def fluent_mask(fluents, index: dict) -> int:
+    """ encode a collection of fluents as an integer bitset
+
+    :param fluents: iterable of fluents
+    :param index: dict of fluent to bit position, see fluent_index
+    :return: int with the bit of each fluent set
+    """
+    mask = 0
+    for fluent in fluents:
+        mask |= 1 << index[fluent]
+    return mask
+
+
+def encode_state_bits(fs: FluentState, index: dict) -> int:
+    """ encode fluents to an integer bitset, bit i is set iff fluent i is true
+
+    :param fs: FluentState object
+    :param index: dict of fluent to bit position, see fluent_index
+    :return: int eg. 0b101001 for the state "TFFTFT"
+    """
+    return fluent_mask(fs.pos, index)
+
+
+def compile_action(action, index: dict) -> ActionMasks:
+    """ compile the preconditions and effects of a ground action to bitsets
+
+    An action applies in state s iff s & pre_pos == pre_pos and not s & pre_neg,
+    and results in (s & ~rem) | add.
+
+    :param action: Action object with no variables
+    :param index: dict of fluent to bit position, see fluent_index
+    :return: ActionMasks
+    """
+    return ActionMasks(fluent_mask(action.precond_pos, index),
+                       fluent_mask(action.precond_neg, index),
+                       fluent_mask(action.effect_add, index),
+                       fluent_mask(action.effect_rem, index))
+
+
+def set_bits(mask: int) -> list:
+    """ positions of the set bits of a bitset, lowest first
+
+    :param mask: int
+    :return: list of int
+    """
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
+
+
+class ActionIndex():
+    """ index of ground actions by the fluents in their preconditions
+
+    Every action is filed under one "watched" positive precondition, the one
+    required by the fewest actions, so the candidates in a state are the
+    actions watched by its true fluents rather than every ground action.
+    Lists of applicable actions keep the order of the action_masks dict.
+
+    :param action_masks: dict of Action to ActionMasks, in a fixed order
+    :param size: int number of fluents in the state map
+    """
+
+    def __init__(self, action_masks: dict, size: int):
+        self.action_masks = action_masks
+        self.order = {action: pos for pos, action in enumerate(action_masks)}
+        # actions requiring fluent i to be true
+        self.requires = [[] for _ in range(size)]
+        for action, masks in action_masks.items():
+            for bit in set_bits(masks.pre_pos):
+                self.requires[bit].append(action)
+        self.watched = [[] for _ in range(size)]
+        self.unwatched = []
+        for action, masks in action_masks.items():
+            bits = set_bits(masks.pre_pos)
+            if bits:
+                watch = min(bits, key=lambda bit: len(self.requires[bit]))
+                self.watched[watch].append((self.order[action], action, masks))
+            else:
+                self.unwatched.append((self.order[action], action, masks))
+
+    def applicable(self, state: int) -> list:
+        """ the actions whose preconditions hold in a state
+
+        :param state: int bitset
+        :return: list of Action
+        """
+        found = [(pos, action) for pos, action, masks in self.unwatched
+                 if not state & masks.pre_neg]
+        for bit in set_bits(state):
+            for pos, action, masks in self.watched[bit]:
+                if state & masks.pre_pos == masks.pre_pos and not state & masks.pre_neg:
+                    found.append((pos, action))
+        found.sort()
+        return [action for _, action in found]
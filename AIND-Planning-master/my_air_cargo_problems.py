@@ -1,11 +1,12 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, Problem,
 )
 from aimacode.utils import expr
+from lp_grounding import ActionSchema, ground_actions
 from lp_utils import (
-    FluentState, encode_state, decode_state,
+    FluentState, encode_state, decode_state, encode_state_bits,
+    fluent_index, fluent_mask, compile_action, ActionIndex,
 )
 from my_planning_graph import PlanningGraph
 
@@ -13,7 +14,8 @@ from functools import lru_cache
 
 
 class AirCargoProblem(Problem):
-    def __init__(self, cargos, planes, airports, initial: FluentState, goal: list):
+    def __init__(self, cargos, planes, airports, initial: FluentState, goal: list,
+                 schemas: list = None):
         """
 
         :param cargos: list of str
@@ -26,14 +28,27 @@ class AirCargoProblem(Problem):
             positive and negative literal fluents (as expr) describing initial state
         :param goal: list of expr
             literal fluents required for goal test
+        :param schemas: list of ActionSchema over the types Cargo, Plane and Airport
+            (e.g. read from a PDDL domain by lp_pddl), or None for the Load,
+            Unload and Fly schemas of the Air Cargo domain
+
+        States are integer bitsets over state_map: bit i is set iff
+        state_map[i] is true (see lp_utils.encode_state_bits).
         """
         self.state_map = initial.pos + initial.neg
+        self.fluent_index = fluent_index(self.state_map)
         self.initial_state_TF = encode_state(initial, self.state_map)
-        Problem.__init__(self, self.initial_state_TF, goal=goal)
+        Problem.__init__(self, encode_state_bits(initial, self.fluent_index), goal=goal)
+        self.goal_mask = fluent_mask(goal, self.fluent_index)
         self.cargos = cargos
         self.planes = planes
         self.airports = airports
+        self.schemas = air_cargo_schemas() if schemas is None else schemas
         self.actions_list = self.get_actions()
+        # precondition and effect bitsets of each ground action, in actions_list order
+        self.action_masks = {action: compile_action(action, self.fluent_index)
+                             for action in self.actions_list}
+        self.action_index = ActionIndex(self.action_masks, len(self.state_map))
 
     def get_actions(self):
         """
@@ -48,96 +63,27 @@ class AirCargoProblem(Problem):
             list of Action objects
         """
 
-        # TODO create concrete Action objects based on the domain action schema for: Load, Unload, and Fly
-        # concrete actions definition: specific literal action that does not include variables as with the schema
-        # for example, the action schema 'Load(c, p, a)' can represent the concrete actions 'Load(C1, P1, SFO)'
+        # the action schemas are grounded by lp_grounding, which only keeps the
+        # concrete actions that are reachable from the initial state, e.g. the schema
+        # 'Load(c, p, a)' can represent the concrete actions 'Load(C1, P1, SFO)'
         # or 'Load(C2, P2, JFK)'.  The actions for the planning problem must be concrete because the problems in
         # forward search and Planning Graphs must use Propositional Logic
+        objects = {"Cargo": self.cargos, "Plane": self.planes, "Airport": self.airports}
+        initial = decode_state(self.initial, self.state_map).pos
+        return ground_actions(self.schemas, objects, initial)
 
-        def load_actions():
-            """Create all concrete Load actions and return a list
-
-            :return: list of Action objects
-            """
-            loads = []
-            for cargo in self.cargos:
-                for plane in self.planes:
-                    for airport in self.airports:
-                        precond_pos = [expr("At({}, {})".format(cargo, airport)),
-                            expr("At({}, {})".format(plane, airport))]
-                        precond_neg = []
-                        effect_add = [expr("In({}, {})".format(cargo, plane))]
-                        effect_rem = [expr("At({}, {})".format(cargo, airport))]
-                        load = Action(expr("Load({}, {}, {})".format(cargo, plane, airport)),
-                            [precond_pos, precond_neg],
-                            [effect_add, effect_rem])
-                        loads.append(load)
-            return loads
-
-        def unload_actions():
-            """Create all concrete Unload actions and return a list
-
-            :return: list of Action objects
-            """
-            unloads = []
-            for cargo in self.cargos:
-                for plane in self.planes:
-                    for airport in self.airports:
-                        precond_pos = [expr("In({}, {})".format(cargo, plane)),
-                            expr("At({}, {})".format(plane, airport))]
-                        precond_neg = []
-                        effect_add = [expr("At({}, {})".format(cargo, airport))]
-                        effect_rem = [expr("In({}, {})".format(cargo, plane))]
-                        unload = Action(expr("Unload({}, {}, {})".format(cargo, plane, airport)),
-                            [precond_pos, precond_neg],
-                            [effect_add, effect_rem])
-                        unloads.append(unload)
-            return unloads
-
-        def fly_actions():
-            """Create all concrete Fly actions and return a list
-
-            :return: list of Action objects
-            """
-            flys = []
-            for fr in self.airports:
-                for to in self.airports:
-                    if fr != to:
-                        for p in self.planes:
-                            precond_pos = [expr("At({}, {})".format(p, fr)),
-                                           ]
-                            precond_neg = []
-                            effect_add = [expr("At({}, {})".format(p, to))]
-                            effect_rem = [expr("At({}, {})".format(p, fr))]
-                            fly = Action(expr("Fly({}, {}, {})".format(p, fr, to)),
-                                         [precond_pos, precond_neg],
-                                         [effect_add, effect_rem])
-                            flys.append(fly)
-            return flys
-
-        return load_actions() + unload_actions() + fly_actions()
-
-    def actions(self, state: str) -> list:
+    def actions(self, state: int) -> list:
         """ Return the actions that can be executed in the given state.
 
-        :param state: str
-            state represented as T/F string of mapped fluents (state variables)
-            e.g. 'FTTTFF'
+        :param state: int
+            state represented as a bitset of mapped fluents (state variables)
+            e.g. 0b001110
         :return: list of Action objects
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        possible_actions = []
-        for action in self.actions_list:
-            # all positive pre-conditions must exist
-            is_positive_preconds = set(action.precond_pos).issubset(set(kb.clauses))
-            # not even one negative pre-condition mus exist
-            is_negative_preconds = not bool(set(action.precond_neg).intersection(set(kb.clauses)))
-            if is_positive_preconds and is_negative_preconds:
-                possible_actions.append(action)
-        return possible_actions
+        # only the actions indexed under a true fluent are candidates
+        return self.action_index.applicable(state)
 
-    def result(self, state: str, action: Action):
+    def result(self, state: int, action: Action):
         """ Return the state that results from executing the given
         action in the given state. The action must be one of
         self.actions(state).
@@ -146,34 +92,18 @@ class AirCargoProblem(Problem):
         :param action: Action applied
         :return: resulting state after action
         """
-        new_state = FluentState([], [])
-        old_state = decode_state(state, self.state_map)
-        for fluent in old_state.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-        for fluent in old_state.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)        
-        return encode_state(new_state, self.state_map)
+        masks = self.action_masks.get(action)
+        if masks is None:
+            masks = compile_action(action, self.fluent_index)
+        return state & ~masks.rem | masks.add
 
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached
 
-        :param state: str representing state
+        :param state: int representing state
         :return: bool
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+        return state & self.goal_mask == self.goal_mask
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
@@ -199,13 +129,31 @@ class AirCargoProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        kb = PropKB()
-        kb.tell(decode_state(node.state, self.state_map).pos_sentence())
-        count = 0
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                count += 1
-        return count
+        # each action achieves at most one goal fluent, so count the unmet ones
+        return bin(self.goal_mask & ~node.state).count('1')
+
+
+def air_cargo_schemas() -> list:
+    """ the Load, Unload and Fly action schemas of the Air Cargo domain
+
+    :return: list of ActionSchema
+    """
+    load = ActionSchema(
+        Action(expr("Load(c, p, a)"),
+               [[expr("At(c, a)"), expr("At(p, a)")], []],
+               [[expr("In(c, p)")], [expr("At(c, a)")]]),
+        ("Cargo", "Plane", "Airport"))
+    unload = ActionSchema(
+        Action(expr("Unload(c, p, a)"),
+               [[expr("In(c, p)"), expr("At(p, a)")], []],
+               [[expr("At(c, a)")], [expr("In(c, p)")]]),
+        ("Cargo", "Plane", "Airport"))
+    fly = ActionSchema(
+        Action(expr("Fly(p, fr, to)"),
+               [[expr("At(p, fr)")], []],
+               [[expr("At(p, to)")], [expr("At(p, fr)")]]),
+        ("Plane", "Airport", "Airport"), distinct=True)
+    return [load, unload, fly]
 
 
 def air_cargo_p1() -> AirCargoProblem:
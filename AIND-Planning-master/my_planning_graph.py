@@ -203,10 +203,11 @@ class PlanningGraph():
     graph can be used to reason about 
     """
 
-    def __init__(self, problem: Problem, state: str, serial_planning=True):
+    def __init__(self, problem: Problem, state, serial_planning=True):
         """
         :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
-        :param state: str (will be in form TFTTFF... representing fluent states)
+        :param state: str (will be in form TFTTFF... representing fluent states) or int bitset
+            (as used by AirCargoProblem, see lp_utils.encode_state_bits)
         :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
         Instance variable calculated:
             fs: FluentState
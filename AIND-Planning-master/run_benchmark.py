@@ -0,0 +1,105 @@
+import argparse
+import csv
+import multiprocessing
+import sys
+from timeit import default_timer as timer
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from lp_pddl import generate_air_cargo
+from run_search import PrintableProblem, SEARCHES
+
+DEFAULT_SIZES = ["2,2,2", "3,2,3", "3,3,3", "4,2,4", "5,3,4", "6,3,5"]
+
+FIELDS = ["cargos", "planes", "airports", "seed", "search", "heuristic", "status",
+          "expansions", "goal_tests", "new_nodes", "plan_length", "seconds", "peak_kb"]
+
+
+def run_one(sizes, seed, search_index, conn):
+    """Solve one generated instance with one search and send back its metrics.
+
+    Runs in a fresh process, so the peak resident set size it reports only
+    covers this search.
+    """
+    cargos, planes, airports = sizes
+    _, search_function, heuristic = SEARCHES[search_index]
+    problem = generate_air_cargo(cargos, planes, airports, seed)
+    ip = PrintableProblem(problem)
+    start = timer()
+    if heuristic:
+        node = search_function(ip, getattr(problem, heuristic))
+    else:
+        node = search_function(ip)
+    elapsed = timer() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else ""
+    conn.send({"status": "solved" if node else "failed",
+               "expansions": ip.succs, "goal_tests": ip.goal_tests, "new_nodes": ip.states,
+               "plan_length": len(node.solution()) if node else "",
+               "seconds": "{:.4f}".format(elapsed), "peak_kb": peak_kb})
+    conn.close()
+
+
+def benchmark(sizes, seed, search_index, timeout):
+    """Return the metrics row of one search, killing it after `timeout` seconds."""
+    name, _, heuristic = SEARCHES[search_index]
+    row = {"cargos": sizes[0], "planes": sizes[1], "airports": sizes[2], "seed": seed,
+           "search": name, "heuristic": heuristic}
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=run_one, args=(sizes, seed, search_index, sender))
+    process.start()
+    sender.close()
+    if receiver.poll(timeout):
+        row.update(receiver.recv())
+    else:
+        row.update(status="timeout", seconds=timeout)
+    process.terminate()
+    process.join()
+    return row
+
+
+def main(sizes, seeds, s_choices, timeout, out):
+    writer = csv.DictWriter(out, FIELDS, restval="")
+    writer.writeheader()
+    for size in sizes:
+        for seed in seeds:
+            for i in s_choices:
+                row = benchmark(size, seed, i - 1, timeout)
+                writer.writerow(row)
+                out.flush()
+                print("{cargos}x{planes}x{airports} seed {seed}: {search} {heuristic} "
+                      "-> {status} in {seconds}s".format(**row), file=sys.stderr)
+
+
+def parse_size(text):
+    try:
+        cargos, planes, airports = (int(n) for n in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("sizes are CARGOS,PLANES,AIRPORTS, got {!r}".format(text))
+    return cargos, planes, airports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the searches of run_search.py on " +
+        "randomly generated air cargo problems of increasing size. Each search runs in its own " +
+        "process and the metrics are written as CSV.")
+    parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int,
+                        metavar='', default=[1, 9, 10],
+                        help="Indices of the search algorithms to run (see run_search.py). Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('--sizes', nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+                        metavar='N,M,K', help="Instance sizes as cargos,planes,airports.")
+    parser.add_argument('--seeds', nargs="+", type=int, default=[0],
+                        help="Seeds of the generated instances of every size.")
+    parser.add_argument('--timeout', type=float, default=60.,
+                        help="Seconds after which a search is stopped and reported as a timeout.")
+    parser.add_argument('-o', '--output', help="CSV file to write (default: standard output).")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            main(args.sizes, args.seeds, args.searches, args.timeout, out)
+    else:
+        main(args.sizes, args.seeds, args.searches, args.timeout, sys.stdout)
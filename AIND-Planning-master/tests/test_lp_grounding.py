@@ -0,0 +1,53 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+from aimacode.planning import Action
+from aimacode.utils import expr
+import unittest
+from example_have_cake import have_cake
+from lp_grounding import ActionSchema, ground_actions
+
+
+class TestGrounding(unittest.TestCase):
+
+    def setUp(self):
+        self.eat = ActionSchema(
+            Action(expr("Eat(x)"),
+                   [[expr("Have(x)")], []],
+                   [[expr("Eaten(x)")], [expr("Have(x)")]]),
+            ("Food",))
+
+    def test_unreachable_actions_pruned(self):
+        actions = ground_actions([self.eat], {"Food": ["Cake", "Pie"]}, [expr("Have(Cake)")])
+        self.assertEqual([str(a) for a in actions], ["Eat(Cake,)"])
+        self.assertEqual(actions[0].precond_pos, [expr("Have(Cake)")])
+        self.assertEqual(actions[0].effect_rem, [expr("Have(Cake)")])
+
+    def test_relaxed_fixpoint(self):
+        # Eat(Pie) only becomes reachable once Bake(Pie) is
+        bake = ActionSchema(
+            Action(expr("Bake(x)"), [[], [expr("Have(x)")]], [[expr("Have(x)")], []]),
+            ("Food",))
+        actions = ground_actions([self.eat, bake], {"Food": ["Cake", "Pie"]},
+                                 [expr("Have(Cake)")])
+        self.assertEqual([str(a) for a in actions],
+                         ["Eat(Cake,)", "Eat(Pie,)", "Bake(Cake,)", "Bake(Pie,)"])
+
+    def test_types_and_distinct(self):
+        fly = ActionSchema(
+            Action(expr("Fly(p, fr, to)"),
+                   [[expr("At(p, fr)")], []],
+                   [[expr("At(p, to)")], [expr("At(p, fr)")]]),
+            ("Plane", "Airport", "Airport"), distinct=True)
+        objects = {"Plane": ["P1"], "Airport": ["SFO", "JFK"], "Cargo": ["C1"]}
+        actions = ground_actions([fly], objects, [expr("At(P1, SFO)"), expr("At(C1, SFO)")])
+        self.assertEqual([str(a) for a in actions], ["Fly(P1, SFO, JFK)", "Fly(P1, JFK, SFO)"])
+
+    def test_have_cake(self):
+        p = have_cake()
+        self.assertEqual([str(a) for a in p.actions_list], ["Eat(Cake,)", "Bake(Cake,)"])
+
+
+if __name__ == '__main__':
+    unittest.main()
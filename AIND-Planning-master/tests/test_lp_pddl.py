@@ -0,0 +1,65 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+from aimacode.search import astar_search
+import unittest
+from lp_pddl import (
+    AIR_CARGO_DOMAIN, generate_air_cargo, load_air_cargo_files, random_air_cargo,
+    read_domain, read_problem,
+)
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p3
+
+
+class TestPddlReader(unittest.TestCase):
+
+    def problem_path(self, name):
+        return os.path.join(os.path.dirname(AIR_CARGO_DOMAIN), name)
+
+    def test_domain(self):
+        with open(AIR_CARGO_DOMAIN) as f:
+            domain = read_domain(f.read())
+        self.assertEqual([s.action.name for s in domain.schemas], ['Load', 'Unload', 'Fly'])
+        fly = domain.schemas[2]
+        self.assertEqual(fly.types, ('Plane', 'Airport', 'Airport'))
+        self.assertEqual([str(f) for f in fly.action.precond_pos], ['At(p, from)'])
+        self.assertEqual([tuple(map(str, pair)) for pair in fly.distinct], [('from', 'to')])
+
+    def test_matches_hand_written_problems(self):
+        for name, factory in (('air_cargo_p1.pddl', air_cargo_p1), ('air_cargo_p3.pddl', air_cargo_p3)):
+            p = load_air_cargo_files(AIR_CARGO_DOMAIN, self.problem_path(name))
+            expected = factory()
+            self.assertEqual([str(a) for a in p.actions_list],
+                             [str(a) for a in expected.actions_list])
+            self.assertEqual(set(p.state_map), set(expected.state_map))
+            self.assertEqual(p.goal, expected.goal)
+            self.assertEqual(len(p.actions(p.initial)), len(expected.actions(expected.initial)))
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            read_problem("(define (problem x) (:domain air-cargo) (:objects c1 - cargo) "
+                         "(:init) (:goal (or (at c1 a1) (at c1 a2))))")
+        with self.assertRaises(ValueError):
+            read_problem("(define (problem x) (:domain air-cargo)")
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_deterministic(self):
+        self.assertEqual(random_air_cargo(4, 2, 3, seed=7), random_air_cargo(4, 2, 3, seed=7))
+        self.assertNotEqual(random_air_cargo(4, 2, 3, seed=7), random_air_cargo(4, 2, 3, seed=8))
+
+    def test_sizes(self):
+        p = generate_air_cargo(3, 2, 3, seed=1)
+        self.assertEqual((len(p.cargos), len(p.planes), len(p.airports)), (3, 2, 3))
+        self.assertEqual(len(p.goal), 3)
+        # every cargo can reach every airport on every plane
+        self.assertEqual(len(p.actions_list), 2 * 3 * 2 * 3 + 2 * 3 * 2)
+        self.assertEqual(len(p.state_map), 3 * 3 + 2 * 3 + 3 * 2)
+        self.assertFalse(p.goal_test(p.initial))
+        node = astar_search(p, p.h_ignore_preconditions)
+        self.assertTrue(p.goal_test(node.state))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@ from aimacode.planning import Action
 from aimacode.utils import expr
 from aimacode.search import Node
 import unittest
-from lp_utils import decode_state
+from lp_utils import decode_state, encode_state_bits, true_fluents, FluentState
+import random
 from my_air_cargo_problems import (
     air_cargo_p1, air_cargo_p2, air_cargo_p3,
 )
@@ -17,7 +18,7 @@ class TestAirCargoProb1(unittest.TestCase):
         self.p1 = air_cargo_p1()
 
     def test_ACP1_num_fluents(self):
-        self.assertEqual(len(self.p1.initial), 12)
+        self.assertEqual(len(self.p1.state_map), 12)
 
     def test_ACP1_num_requirements(self):
         self.assertEqual(len(self.p1.goal),2)
@@ -29,7 +30,7 @@ class TestAirCargoProb2(unittest.TestCase):
         self.p2 = air_cargo_p2()
 
     def test_ACP2_num_fluents(self):
-        self.assertEqual(len(self.p2.initial), 27)
+        self.assertEqual(len(self.p2.state_map), 27)
 
     def test_ACP2_num_requirements(self):
         self.assertEqual(len(self.p2.goal),3)
@@ -41,7 +42,7 @@ class TestAirCargoProb3(unittest.TestCase):
         self.p3 = air_cargo_p3()
 
     def test_ACP3_num_fluents(self):
-        self.assertEqual(len(self.p3.initial), 32)
+        self.assertEqual(len(self.p3.state_map), 32)
 
     def test_ACP3_num_requirements(self):
         self.assertEqual(len(self.p3.goal),4)
@@ -76,9 +77,61 @@ class TestAirCargoMethods(unittest.TestCase):
         self.assertTrue(expr('In(C1, P1)') in fs.pos)
         self.assertTrue(expr('At(C1, SFO)') in fs.neg)
 
+    def test_AC_bitset_state(self):
+        self.assertIsInstance(self.p1.initial, int)
+        fs = decode_state(self.p1.initial, self.p1.state_map)
+        self.assertEqual(self.p1.initial, encode_state_bits(fs, self.p1.fluent_index))
+        self.assertEqual(set(fs.pos), {expr('At(C1, SFO)'), expr('At(C2, JFK)'),
+                                       expr('At(P1, SFO)'), expr('At(P2, JFK)')})
+        # the externally built action and its ground copy in actions_list agree
+        load = [a for a in self.p1.actions(self.p1.initial) if str(a) == str(self.act1)][0]
+        self.assertEqual(self.p1.result(self.p1.initial, load),
+                         self.p1.result(self.p1.initial, self.act1))
+
+    def test_AC_goal_test(self):
+        self.assertFalse(self.p1.goal_test(self.p1.initial))
+        goal = encode_state_bits(FluentState(self.p1.goal, []), self.p1.fluent_index)
+        self.assertTrue(self.p1.goal_test(goal))
+        self.assertTrue(self.p1.goal_test(goal | self.p1.initial))
+
     def test_h_ignore_preconditions(self):
         n = Node(self.p1.initial)
         self.assertEqual(self.p1.h_ignore_preconditions(n),2)
 
+    def test_h_ignore_preconditions_partial_goal(self):
+        unload = Action(
+            expr('Unload(C1, P1, JFK)'),
+            [[expr('In(C1, P1)'), expr('At(P1, JFK)')], []],
+            [[expr('At(C1, JFK)')], [expr('In(C1, P1)')]]
+        )
+        state = self.p1.result(self.p1.initial, unload)
+        self.assertEqual(self.p1.h_ignore_preconditions(Node(state)), 1)
+
+    def test_true_fluents(self):
+        fluents = true_fluents(self.p1.initial, self.p1.state_map)
+        self.assertEqual(fluents, frozenset(decode_state(self.p1.initial, self.p1.state_map).pos))
+        self.assertEqual(true_fluents('TF', self.p1.state_map[:2]), {self.p1.state_map[0]})
+
+class TestActionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.p3 = air_cargo_p3()
+
+    def scan(self, state):
+        return [action for action, masks in self.p3.action_masks.items()
+                if state & masks.pre_pos == masks.pre_pos and not state & masks.pre_neg]
+
+    def test_applicable_matches_scan(self):
+        self.assertEqual(self.p3.actions(self.p3.initial), self.scan(self.p3.initial))
+
+    def test_applicable_matches_scan_along_random_walk(self):
+        rng = random.Random(0)
+        state = self.p3.initial
+        for _ in range(200):
+            applicable = self.p3.actions(state)
+            self.assertEqual(applicable, self.scan(state))
+            state = self.p3.result(state, rng.choice(applicable))
+
+
 if __name__ == '__main__':
     unittest.main()